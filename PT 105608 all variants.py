@@ -0,0 +1,107 @@
+import numpy as np
+import matplotlib.pyplot as plt
+from scipy.stats import skewnorm, norm
+
+from base_layers import load_base, render_variants
+
+# Renders the given histograms and every answer variant of PT 105608 from one shared
+# base layer: the seeded data and the bars are produced once, and each variant only
+# draws its black overlay curve on top. The images carry an "_all_variants" suffix so
+# they never overwrite the ones saved by the per-variant scripts of this PT.
+
+# Common settings for all histograms
+num_samples = 1000
+bin_count = 15
+alpha = 0.7  # Transparency for histograms
+skewness = 5  # Positive skewness parameter
+neg_skewness = -5  # Negative skewness for incorrect curves
+
+# Custom colors from hex codes
+colors = ['#838EF0', '#60B2DE', '#19C9D6', '#03A28D']
+
+# (skewness, location, scale), title, x label, y label, x limits for each version
+versions = [
+    ((skewness, 0.2, 0.1), "Reaction Times (seconds)", "Reaction Time (seconds)", "Frequency", [0, 1.2]),
+    ((skewness, 40, 15), "Annual Household Incomes ($ thousands)", "Annual Household Income ($ thousands)",
+     "Number of Households", [0, 150]),
+    ((skewness, 50, 20), "Daily Customer Numbers", "Number of Customers per Day", "Frequency (Days)", [0, 200]),
+    ((skewness, 40, 15), "Quiz Scores (out of 100)", "Quiz Score", "Number of Students", [0, 100]),
+]
+
+
+# --- Base layer: seeded data, bars and labels shared by every variant ---
+def build_given_histograms(seed):
+    np.random.seed(seed)
+    fig, axes = plt.subplots(2, 2, figsize=(12, 10))
+    fig.suptitle("Positively Skewed Histograms for Problem Templates", fontsize=16)
+
+    datasets = []
+    for ax, color, (params, title, xlabel, ylabel, xlim) in zip(axes.flat, colors, versions):
+        a, loc, scale = params
+        data = skewnorm.rvs(a, loc=loc, scale=scale, size=num_samples)
+        ax.hist(data, bins=bin_count, alpha=alpha, color=color, edgecolor='black')
+        ax.set_title(title)
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel(ylabel)
+        ax.set_xlim(xlim)
+        datasets.append(data)
+    return fig, datasets
+
+
+# Scale a PDF so its peak matches the tallest histogram bar
+def scale_to_histogram(y, data):
+    hist_height, _ = np.histogram(data, bins=bin_count)
+    return y * (max(hist_height) / max(y))
+
+
+# --- Overlays: one function per answer variant ---
+def correct_curves(axes, datasets):
+    for ax, data in zip(axes.flat, datasets):
+        a, loc, scale = skewnorm.fit(data)
+        x = np.linspace(min(data), max(data), 1000)
+        y = skewnorm.pdf(x, a, loc, scale)
+        ax.plot(x, scale_to_histogram(y, data), color='black', linewidth=2)
+
+
+def misaligned_curves(axes, datasets):
+    for ax, data in zip(axes.flat, datasets):
+        x = np.linspace(min(data)*0.5, max(data)*0.8, 1000)  # Intentionally too narrow
+        incorrect_skew = skewness * 0.6
+        incorrect_loc = np.min(data) + (np.mean(data) - np.min(data))*0.7  # Shifted left
+        incorrect_scale = np.std(data)*0.6  # Shorter tail
+        y = skewnorm.pdf(x, incorrect_skew, incorrect_loc, incorrect_scale)
+        ax.plot(x, scale_to_histogram(y, data), color='black', linewidth=2)
+
+
+def symmetric_curves(axes, datasets):
+    for ax, data in zip(axes.flat, datasets):
+        x = np.linspace(min(data), max(data), 1000)
+        mean = np.mean(data) + np.std(data)/2  # Offset mean to make it clearly wrong
+        std = np.std(data)*0.8  # Slightly narrower than the actual data
+        y = norm.pdf(x, mean, std)
+        ax.plot(x, scale_to_histogram(y, data), color='black', linewidth=2)
+
+
+def negatively_skewed_curves(axes, datasets):
+    for ax, data in zip(axes.flat, datasets):
+        x = np.linspace(min(data), max(data), 1000)
+        loc = np.mean(data) + np.std(data)  # Shift right to make it clearly wrong
+        scale = np.std(data)/2
+        y = skewnorm.pdf(x, neg_skewness, loc, scale)
+        ax.plot(x, scale_to_histogram(y, data), color='black', linewidth=2)
+
+
+fig, datasets = load_base(build_given_histograms, 42)
+render_variants(
+    fig, datasets,
+    [
+        ("positively_skewed_histograms_given_all_variants.png", None),
+        ("positively_skewed_histograms_all_variants.png", correct_curves),
+        ("misaligned_positively_skewed_curves_all_variants.png", misaligned_curves),
+        ("incorrect_normal_curves_all_variants.png", symmetric_curves),
+        ("incorrect_negatively_skewed_curves_all_variants.png", negatively_skewed_curves),
+    ],
+    layout=lambda fig: fig.tight_layout(),
+    dpi=300, bbox_inches='tight',
+)
+plt.close(fig)
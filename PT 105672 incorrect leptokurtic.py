@@ -1,6 +1,7 @@
 import numpy as np
 import matplotlib.pyplot as plt
 from scipy.stats import laplace # Import the Laplace distribution for its leptokurtic shape
+from freq_table import get_bin_edges, weighted_mean_std
 
 # --- Data from Provided Tables (Third Version) ---
 
@@ -20,13 +21,6 @@ sales_freqs = [5, 8, 12, 18, 25, 35, 50, 65, 80, 85, 80, 90, 95, 90, 95, 85, 95,
 commute_bins = [10, 12, 14, 16, 18, 20, 22, 24, 26, 28, 30, 32, 34, 36, 38, 40, 42, 44, 46, 48, 50, 52, 54, 56, 58, 60, 62, 64, 66, 68, 70, 72, 74]
 commute_freqs = [5, 8, 12, 18, 25, 35, 50, 65, 80, 95, 95, 100, 95, 100, 105, 100, 95, 95, 90, 90, 85, 90, 90, 85, 70, 55, 45, 35, 25, 15, 10, 5, 2]
 
-
-# Reconstruct raw data from frequency tables
-data1 = np.repeat(score_bins, score_freqs)
-data2 = np.repeat(height_bins, height_freqs)
-data3 = np.repeat(sales_bins, sales_freqs)
-data4 = np.repeat(commute_bins, commute_freqs)
-
 # --- Plotting Setup ---
 
 # Create a figure with 4 subplots, increased size for better spacing
@@ -40,63 +34,56 @@ curve_color = 'black'
 curve_linewidth = 2.5
 colors = ['#9EDAE2', '#60B2DE', '#A5CDF2', '#03A28D']
 
-# --- Helper function to calculate bin edges ---
-def get_bin_edges(bin_centers):
-    bin_width = bin_centers[1] - bin_centers[0]
-    start_edge = bin_centers[0] - bin_width / 2
-    end_edge = bin_centers[-1] + bin_width / 2
-    return np.linspace(start_edge, end_edge, len(bin_centers) + 1)
-
 # --- Version 1: Student Test Scores ---
 bins1 = get_bin_edges(score_bins)
-axes[0, 0].hist(data1, bins=bins1, alpha=alpha, color=colors[0], edgecolor=edgecolor)
+axes[0, 0].hist(score_bins, bins=bins1, weights=score_freqs, alpha=alpha, color=colors[0], edgecolor=edgecolor)
 axes[0, 0].set_title("Student Test Scores")
 axes[0, 0].set_xlabel("Test Score")
 axes[0, 0].set_ylabel("Frequency (# of Students)")
 # Add leptokurtic (peaked) curve
-mu1, sigma1 = np.mean(data1), np.std(data1)
+mu1, sigma1 = weighted_mean_std(score_bins, score_freqs)
 x1 = np.linspace(mu1 - 4 * sigma1, mu1 + 4 * sigma1, 200)
 bin_width1 = score_bins[1] - score_bins[0]
-pdf1 = laplace.pdf(x1, loc=mu1, scale=sigma1) * len(data1) * bin_width1
+pdf1 = laplace.pdf(x1, loc=mu1, scale=sigma1) * sum(score_freqs) * bin_width1
 axes[0, 0].plot(x1, pdf1, color=curve_color, linewidth=curve_linewidth)
 
 # --- Version 2: Plant Heights ---
 bins2 = get_bin_edges(height_bins)
-axes[0, 1].hist(data2, bins=bins2, alpha=alpha, color=colors[0], edgecolor=edgecolor)
+axes[0, 1].hist(height_bins, bins=bins2, weights=height_freqs, alpha=alpha, color=colors[0], edgecolor=edgecolor)
 axes[0, 1].set_title("Plant Heights")
 axes[0, 1].set_xlabel("Height (cm)")
 axes[0, 1].set_ylabel("Frequency (# of Plants)")
 # Add leptokurtic (peaked) curve
-mu2, sigma2 = np.mean(data2), np.std(data2)
+mu2, sigma2 = weighted_mean_std(height_bins, height_freqs)
 x2 = np.linspace(mu2 - 4 * sigma2, mu2 + 4 * sigma2, 200)
 bin_width2 = height_bins[1] - height_bins[0]
-pdf2 = laplace.pdf(x2, loc=mu2, scale=sigma2) * len(data2) * bin_width2
+pdf2 = laplace.pdf(x2, loc=mu2, scale=sigma2) * sum(height_freqs) * bin_width2
 axes[0, 1].plot(x2, pdf2, color=curve_color, linewidth=curve_linewidth)
 
 # --- Version 3: Daily Product Sales ---
 bins3 = get_bin_edges(sales_bins)
-axes[1, 0].hist(data3, bins=bins3, alpha=alpha, color=colors[0], edgecolor=edgecolor)
+axes[1, 0].hist(sales_bins, bins=bins3, weights=sales_freqs, alpha=alpha, color=colors[0], edgecolor=edgecolor)
 axes[1, 0].set_title("Daily Product Sales")
 axes[1, 0].set_xlabel("Daily Sales (Units)")
 axes[1, 0].set_ylabel("Frequency (# of Days)")
 # Add leptokurtic (peaked) curve
-mu3, sigma3 = np.mean(data3), np.std(data3)
+mu3, sigma3 = weighted_mean_std(sales_bins, sales_freqs)
 x3 = np.linspace(mu3 - 4 * sigma3, mu3 + 4 * sigma3, 200)
 bin_width3 = sales_bins[1] - sales_bins[0]
-pdf3 = laplace.pdf(x3, loc=mu3, scale=sigma3) * len(data3) * bin_width3
+pdf3 = laplace.pdf(x3, loc=mu3, scale=sigma3) * sum(sales_freqs) * bin_width3
 axes[1, 0].plot(x3, pdf3, color=curve_color, linewidth=curve_linewidth)
 
 # --- Version 4: Commute Times ---
 bins4 = get_bin_edges(commute_bins)
-axes[1, 1].hist(data4, bins=bins4, alpha=alpha, color=colors[0], edgecolor=edgecolor)
+axes[1, 1].hist(commute_bins, bins=bins4, weights=commute_freqs, alpha=alpha, color=colors[0], edgecolor=edgecolor)
 axes[1, 1].set_title("Commute Times")
 axes[1, 1].set_xlabel("Commute Time (minutes)")
 axes[1, 1].set_ylabel("Frequency (# of Employees)")
 # Add leptokurtic (peaked) curve
-mu4, sigma4 = np.mean(data4), np.std(data4)
+mu4, sigma4 = weighted_mean_std(commute_bins, commute_freqs)
 x4 = np.linspace(mu4 - 4 * sigma4, mu4 + 4 * sigma4, 200)
 bin_width4 = commute_bins[1] - commute_bins[0]
-pdf4 = laplace.pdf(x4, loc=mu4, scale=sigma4) * len(data4) * bin_width4
+pdf4 = laplace.pdf(x4, loc=mu4, scale=sigma4) * sum(commute_freqs) * bin_width4
 axes[1, 1].plot(x4, pdf4, color=curve_color, linewidth=curve_linewidth)
 
 # Adjust layout to prevent titles and labels from overlapping
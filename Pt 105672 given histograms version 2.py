@@ -1,5 +1,6 @@
 import numpy as np
 import matplotlib.pyplot as plt
+from freq_table import get_bin_edges
 
 # --- Data from Provided Tables (Third Version) ---
 
@@ -19,13 +20,6 @@ sales_freqs = [5, 8, 12, 18, 25, 35, 50, 65, 80, 85, 80, 90, 95, 90, 95, 85, 95,
 commute_bins = [10, 12, 14, 16, 18, 20, 22, 24, 26, 28, 30, 32, 34, 36, 38, 40, 42, 44, 46, 48, 50, 52, 54, 56, 58, 60, 62, 64, 66, 68, 70, 72, 74]
 commute_freqs = [5, 8, 12, 18, 25, 35, 50, 65, 80, 95, 95, 100, 95, 100, 105, 100, 95, 95, 90, 90, 85, 90, 90, 85, 70, 55, 45, 35, 25, 15, 10, 5, 2]
 
-
-# Reconstruct raw data from frequency tables using np.repeat
-data1 = np.repeat(score_bins, score_freqs)
-data2 = np.repeat(height_bins, height_freqs)
-data3 = np.repeat(sales_bins, sales_freqs)
-data4 = np.repeat(commute_bins, commute_freqs)
-
 # --- Plotting Setup ---
 
 # Create a figure with 4 subplots (2 rows, 2 columns)
@@ -39,39 +33,30 @@ edgecolor = 'black'
 # Custom colors from hex codes for each plot
 colors = ['#9EDAE2', '#60B2DE', '#A5CDF2', '#03A28D']
 
-
-# --- Helper function to calculate bin edges from bin centers ---
-def get_bin_edges(bin_centers):
-    """Calculates the edges of histogram bins given their center points."""
-    bin_width = bin_centers[1] - bin_centers[0]
-    start_edge = bin_centers[0] - bin_width / 2
-    end_edge = bin_centers[-1] + bin_width / 2
-    return np.linspace(start_edge, end_edge, len(bin_centers) + 1)
-
 # --- Version 1: Student Test Scores ---
 bins1 = get_bin_edges(score_bins)
-axes[0, 0].hist(data1, bins=bins1, alpha=alpha, color=colors[0], edgecolor=edgecolor)
+axes[0, 0].hist(score_bins, bins=bins1, weights=score_freqs, alpha=alpha, color=colors[0], edgecolor=edgecolor)
 axes[0, 0].set_title("Student Test Scores")
 axes[0, 0].set_xlabel("Test Score")
 axes[0, 0].set_ylabel("Frequency (# of Students)")
 
 # --- Version 2: Plant Heights ---
 bins2 = get_bin_edges(height_bins)
-axes[0, 1].hist(data2, bins=bins2, alpha=alpha, color=colors[0], edgecolor=edgecolor)
+axes[0, 1].hist(height_bins, bins=bins2, weights=height_freqs, alpha=alpha, color=colors[0], edgecolor=edgecolor)
 axes[0, 1].set_title("Plant Heights")
 axes[0, 1].set_xlabel("Height (cm)")
 axes[0, 1].set_ylabel("Frequency (# of Plants)")
 
 # --- Version 3: Daily Product Sales ---
 bins3 = get_bin_edges(sales_bins)
-axes[1, 0].hist(data3, bins=bins3, alpha=alpha, color=colors[0], edgecolor=edgecolor)
+axes[1, 0].hist(sales_bins, bins=bins3, weights=sales_freqs, alpha=alpha, color=colors[0], edgecolor=edgecolor)
 axes[1, 0].set_title("Daily Product Sales")
 axes[1, 0].set_xlabel("Daily Sales (Units)")
 axes[1, 0].set_ylabel("Frequency (# of Days)")
 
 # --- Version 4: Commute Times ---
 bins4 = get_bin_edges(commute_bins)
-axes[1, 1].hist(data4, bins=bins4, alpha=alpha, color=colors[0], edgecolor=edgecolor)
+axes[1, 1].hist(commute_bins, bins=bins4, weights=commute_freqs, alpha=alpha, color=colors[0], edgecolor=edgecolor)
 axes[1, 1].set_title("Commute Times")
 axes[1, 1].set_xlabel("Commute Time (minutes)")
 axes[1, 1].set_ylabel("Frequency (# of Employees)")
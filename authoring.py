@@ -0,0 +1,218 @@
+import argparse
+import copy
+import json
+import sys
+import time
+
+import matplotlib
+import matplotlib.pyplot as plt
+
+from base_layers import axes_grid, load_base
+from pt_spec import build_base, evaluate_overlay, overlay_settings
+
+# Authoring mode: live preview of one answer variant while its overlay is tuned.
+#
+# Rendering a variant rebuilds the subplots, bars, titles and tight_layout every
+# time, although a parameter tweak (say the thin-curve scales of PT 105609) only
+# moves the black curves. Here the figure stays alive: the bars and text are drawn
+# once, the canvas background is cached with copy_from_bbox, and each edit only
+# re-evaluates the overlay, restores the background and blits the animated Line2D
+# curves on top of it.
+#
+# The cached background fixes the axis limits. When an edited curve no longer fits
+# inside them, the preview falls back to one full redraw (autoscale, layout and a
+# fresh background) so that it still matches what render_variants would save.
+#
+#   python authoring.py specs/pt_105609.json --variant "thin curves"
+#   > panels.3.set.scale=250
+#   > set.a=-3
+#   > save preview.png
+
+
+class OverlayPreview:
+    """Keeps a PT figure alive and redraws only the overlay of one variant."""
+
+    def __init__(self, spec, variant_name):
+        self.spec = spec
+        variant = next(v for v in spec["variants"] if v["name"] == variant_name)
+        self.overlay = copy.deepcopy(variant.get("overlay", {}))
+        self.fig, self.base = load_base(build_base, json.dumps(spec, sort_keys=True))
+        self.fig.suptitle(variant.get("suptitle", spec["figure"]["suptitle"]),
+                          fontsize=spec["figure"].get("suptitle_fontsize", 16))
+        self.axes = axes_grid(self.fig)
+        self.lines = []
+        for ax in self.axes.flat:
+            line, = ax.plot([], [], animated=True)
+            self.lines.append(line)
+        self.background = None
+        self.full_redraws = 0
+        self.update()
+
+    def _set_curves(self):
+        curves = evaluate_overlay(self.overlay, self.spec, self.base)
+        for i, (line, (x, y)) in enumerate(zip(self.lines, curves)):
+            settings = overlay_settings(self.overlay, i)
+            line.set_data(x, y)
+            line.set_color(settings["color"])
+            line.set_linewidth(settings["linewidth"])
+
+    def _fits(self):
+        for ax, line in zip(self.axes.flat, self.lines):
+            x, y = line.get_data()
+            (x0, x1), (y0, y1) = ax.get_xlim(), ax.get_ylim()
+            if len(x) and (x.min() < x0 or x.max() > x1 or y.min() < y0 or y.max() > y1):
+                return False
+        return True
+
+    def _full_redraw(self):
+        """Autoscales to the curves, re-runs the layout and caches a new background."""
+        for ax, line in zip(self.axes.flat, self.lines):
+            ax.relim()
+            ax.update_datalim(line.get_xydata())
+            ax.autoscale_view()
+        rect = self.spec["figure"].get("tight_layout_rect")
+        self.fig.tight_layout(rect=rect)
+        canvas = self.fig.canvas
+        canvas.draw()
+        self.background = canvas.copy_from_bbox(self.fig.bbox)
+        self.full_redraws += 1
+
+    def update(self):
+        """Redraws the curves from the current overlay and returns the seconds taken."""
+        start = time.perf_counter()
+        self._set_curves()
+        if self.background is None or not self._fits():
+            self._full_redraw()
+        canvas = self.fig.canvas
+        canvas.restore_region(self.background)
+        for ax, line in zip(self.axes.flat, self.lines):
+            ax.draw_artist(line)
+        canvas.blit(self.fig.bbox)
+        canvas.flush_events()
+        return time.perf_counter() - start
+
+    def save(self, filename, **savefig_kwargs):
+        """Saves the current preview as a normal (non-animated) image."""
+        for line in self.lines:
+            line.set_animated(False)
+        try:
+            self.fig.savefig(filename, **{"dpi": self.spec["figure"].get("dpi", 300), "bbox_inches": "tight",
+                                          **savefig_kwargs})
+        finally:
+            for line in self.lines:
+                line.set_animated(True)
+            self.background = None
+            self.update()
+
+
+def parse_edit(text):
+    """Turns "panels.3.set.scale=250" into (keys, value) for apply_edit."""
+    path, _, raw = text.partition("=")
+    try:
+        value = json.loads(raw)
+    except json.JSONDecodeError:
+        value = raw.strip()
+    keys = path.strip().split(".")
+    return keys, value
+
+
+def apply_edit(preview, keys, value):
+    """Sets one overlay value and redraws. An edit that fails to draw is rolled back
+    before its error is raised, so later edits start from the last good overlay."""
+    previous = copy.deepcopy(preview.overlay)
+    try:
+        return _assign_and_update(preview, keys, value)
+    except Exception:
+        preview.overlay = previous
+        preview.update()
+        raise
+
+
+def _assign_and_update(preview, keys, value):
+    # Edits inside the per-panel list go to that panel's dict, the rest to the overlay
+    if keys[0] == "panels":
+        panels = preview.overlay.setdefault("panels", [{} for _ in preview.lines])
+        target = panels[int(keys[1])]
+        keys = keys[2:]
+    else:
+        target = preview.overlay
+    for key in keys[:-1]:
+        target = target.setdefault(key, {})
+    target[keys[-1]] = value
+    return preview.update()
+
+
+def check_rollback(preview):
+    """A bad edit followed by a good one: the bad value must not stay in the overlay."""
+    before = copy.deepcopy(preview.overlay)
+    try:
+        apply_edit(preview, ["dist"], "no_such_distribution")
+        failed_as_expected = False
+    except (KeyError, IndexError, ValueError, TypeError):
+        failed_as_expected = True
+    restored = preview.overlay == before
+    try:
+        apply_edit(preview, ["linewidth"], 4)
+        good_applied = preview.overlay["linewidth"] == 4
+    except Exception:
+        good_applied = False
+    ok = failed_as_expected and restored and good_applied
+    print(f"{'ok' if ok else 'FAIL':<4}  bad edit raised: {failed_as_expected}, rolled back: {restored}, "
+          f"next edit applied: {good_applied}")
+    return 0 if ok else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Live preview of one answer variant while editing its overlay.")
+    parser.add_argument("spec", help="PT spec JSON file")
+    parser.add_argument("--variant", required=True, help="Name of the variant to edit")
+    parser.add_argument("--bench", type=int, metavar="N",
+                        help="Headless: time N overlay-only redraws instead of starting the editor")
+    parser.add_argument("--check", action="store_true",
+                        help="Headless: check that a failing edit is rolled back, then exit")
+    args = parser.parse_args(argv)
+
+    if args.bench or args.check:
+        matplotlib.use("Agg")
+    with open(args.spec) as f:
+        spec = json.load(f)
+    preview = OverlayPreview(spec, args.variant)
+
+    if args.check:
+        return check_rollback(preview)
+
+    if args.bench:
+        timings = []
+        for i in range(args.bench):
+            # Alternate the last panel's scale so every redraw has new data
+            timings.append(apply_edit(preview, ["panels", "3", "set", "scale"], 300 + (i % 2) * 20))
+        timings.sort()
+        print(f"{args.bench} redraws: median {timings[len(timings) // 2] * 1e3:.1f}ms, "
+              f"max {timings[-1] * 1e3:.1f}ms, full redraws {preview.full_redraws}")
+        return 0
+
+    plt.show(block=False)
+    print("Enter edits as path=value (e.g. set.scale=2 or panels.3.set.scale=250), "
+          "'save FILE', 'show' or 'quit'.")
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        if line == "quit":
+            break
+        if line == "show":
+            print(json.dumps(preview.overlay, indent=2))
+        elif line.startswith("save "):
+            preview.save(line[5:].strip())
+        else:
+            try:
+                seconds = apply_edit(preview, *parse_edit(line))
+            except (KeyError, IndexError, ValueError, TypeError) as e:
+                print(f"could not apply {line!r}: {e}")
+                continue
+            print(f"redrawn in {seconds * 1e3:.1f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+import inspect
+import os
+import pickle
+
+import numpy as np
+
+import profiling
+from render_cache import DEFAULT_CACHE_DIR, RenderCache, local_modules, render_key, shared_cache_dir
+
+# Shared "given histogram" base layers.
+#
+# Every answer variant of a PT (given, correct, distractors) draws the same seeded
+# data and the same bars, titles and labels, and only differs in the black overlay
+# curve. A base layer is that common figure: it is built once, kept as a vector
+# (pickled) figure on disk, and each variant only adds its overlay on top of it
+# before being saved. The overlay is removed again so the next variant starts from
+# the untouched bars.
+
+LAYER_OUTPUT = "layer.pkl"
+
+
+def _global_names(code):
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _global_names(const)
+    return names
+
+
+def _is_local(obj, directory):
+    try:
+        path = inspect.getsourcefile(obj)
+    except TypeError:
+        return False
+    return path is not None and os.path.dirname(os.path.abspath(path)) == directory
+
+
+def _referenced_parts(func, directory, modules, seen):
+    # Source of func, then what it reads: plain-data globals by value, repo-local
+    # functions (and class methods) recursively, repo-local modules into modules
+    parts = [inspect.getsource(func)]
+    for name in sorted(_global_names(func.__code__)):
+        value = func.__globals__.get(name)
+        if isinstance(value, (bool, int, float, str, list, tuple, dict)):
+            parts.append(f"{name} = {value!r}")
+            continue
+        if id(value) in seen or not _is_local(value, directory):
+            continue
+        seen.add(id(value))
+        if inspect.isfunction(value):
+            parts += _referenced_parts(value, directory, modules, seen)
+        elif inspect.isclass(value):
+            parts.append(inspect.getsource(value))
+            for member in vars(value).values():
+                if inspect.isfunction(member):
+                    parts += _referenced_parts(member, directory, modules, seen)
+        elif inspect.ismodule(value):
+            with open(inspect.getsourcefile(value), "rb") as f:
+                source = f.read()
+            modules[value.__name__] = source
+            modules.update(local_modules(source, directory))
+    return parts
+
+
+def layer_key(build, *args):
+    """Hashes a base-layer builder: its own source, the repo-local functions and modules
+    it refers to (samplers, binning, the spec pipeline) with their local imports, the
+    plain-data globals it reads (settings such as colors or per-version parameters)
+    and its arguments. The rest of the script, such as the overlays, is left out so
+    editing it keeps the layer."""
+    directory = os.path.dirname(os.path.abspath(inspect.getsourcefile(build)))
+    modules = {}
+    parts = _referenced_parts(build, directory, modules, {id(build)})
+    parts += [f"# {name}\n{modules[name].decode('utf-8')}" for name in sorted(modules)]
+    return render_key("\n".join(parts), extra=[build.__qualname__, repr(args)])
+
+
+def load_base(build, *args, cache_dir=DEFAULT_CACHE_DIR):
+    """Returns (fig, data) from build(*args), reusing the pickled layer when possible.
+
+    build must create a figure with its bars and text only, and return the figure
+    together with whatever the overlays need (usually the sampled datasets). Layers
+    are entries of the render cache in cache_dir, under its size cap and in its
+    stats; a script run by batch_render uses the batch's cache instead of the default.
+    cache_dir=None always builds a fresh layer and stores nothing.
+    """
+    cache_dir = shared_cache_dir(cache_dir)
+    if cache_dir is None:
+        return build(*args)
+    cache = RenderCache(cache_dir)
+    key = layer_key(build, *args)
+    outputs = cache.get(key)
+    if outputs is not None:
+        cache.save()
+        return pickle.loads(outputs[0][1])
+
+    fig, data = build(*args)
+    cache.put(key, [(LAYER_OUTPUT, pickle.dumps((fig, data)))])
+    cache.save()
+    return fig, data
+
+
+def _snapshot(fig):
+    return [(ax, set(map(id, ax.get_children())), ax.get_autoscalex_on(), ax.get_autoscaley_on(),
+             ax.get_xlim(), ax.get_ylim()) for ax in fig.axes]
+
+
+def _restore(snapshot):
+    for ax, children, autoscalex, autoscaley, xlim, ylim in snapshot:
+        for artist in ax.get_children():
+            if id(artist) not in children:
+                artist.remove()
+        ax.set_xlim(xlim)
+        ax.set_ylim(ylim)
+        ax.set_autoscalex_on(autoscalex)
+        ax.set_autoscaley_on(autoscaley)
+        # Forget the data limits of the removed overlay so autoscaling matches a fresh figure
+        ax.relim()
+
+
+def axes_grid(fig):
+    nrows, ncols = fig.axes[0].get_subplotspec().get_gridspec().get_geometry()
+    return np.array(fig.axes[:nrows * ncols], dtype=object).reshape(nrows, ncols)
+
+
+def render_variants(fig, data, variants, layout=None, **savefig_kwargs):
+    """Saves one image per (filename, draw_overlay) pair on top of the shared base.
+
+    draw_overlay(axes, data) adds the variant's curves, with axes shaped like the grid
+    from plt.subplots; pass None to save the bare base layer (the "given histogram"
+    image). layout(fig) is re-run for each variant because an overlay can change the
+    y-axis limits and therefore the tick labels.
+    Returns the list of files written.
+    """
+    axes = axes_grid(fig)
+    written = []
+    for filename, draw_overlay in variants:
+        with profiling.context(variant=os.path.basename(filename)):
+            snapshot = _snapshot(fig)
+            if draw_overlay is not None:
+                with profiling.stage("draw"):
+                    draw_overlay(axes, data)
+            if layout is not None:
+                with profiling.stage("layout"):
+                    layout(fig)
+            with profiling.stage("encode"):
+                fig.savefig(filename, **savefig_kwargs)
+            written.append(filename)
+            _restore(snapshot)
+    return written
+
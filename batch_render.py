@@ -0,0 +1,210 @@
+import argparse
+import concurrent.futures
+import glob
+import importlib
+import io
+import os
+import runpy
+import sys
+import time
+import traceback
+
+import matplotlib
+matplotlib.use("Agg")  # Force a non-interactive backend before pyplot is imported
+import matplotlib.figure
+import matplotlib.pyplot as plt
+
+import profiling
+from render_cache import CACHE_DIR_ENV, DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, RenderCache, script_key
+
+# Batch entry point for the PT question bank.
+#
+# Every "PT ... .py" script is executed inside this one interpreter, so the cost of
+# importing numpy/matplotlib/scipy.stats and loading the font cache is paid once.
+# plt.show() is skipped and every savefig(...) call is captured in memory, then
+# written to the output directory under the file name the script asked for.
+#
+# With --jobs N the scripts are spread across a pool of N worker processes that have
+# already imported the plotting stack. Workers only return the encoded bytes; the
+# parent writes them in script order, so the output is identical for any N.
+#
+# Scripts whose source, seed and library versions match an earlier run are served
+# from the render cache (see render_cache.py) without being executed. The base layers
+# that scripts load (see base_layers.py) are kept in the same cache, in every worker.
+
+DEFAULT_OUT_DIR = "build"
+
+# Pin everything that would otherwise make two renders of the same figure differ
+os.environ.setdefault("SOURCE_DATE_EPOCH", "0")  # PDF/PS creation dates
+matplotlib.rcParams["svg.hashsalt"] = "pt-bank"  # SVG element ids
+
+
+def find_scripts(root="."):
+    """Returns every PT script in the repository root, sorted by file name."""
+    paths = glob.glob(os.path.join(root, "PT*.py")) + glob.glob(os.path.join(root, "Pt*.py"))
+    return sorted(set(paths), key=lambda path: os.path.basename(path).lower())
+
+
+def run_script(path):
+    """Runs one PT script and returns its timing, captured images and any error."""
+    outputs = []
+    original_savefig = matplotlib.figure.Figure.savefig
+    original_show = plt.show
+
+    # Capture the encoded image instead of writing it next to the script
+    def capture_savefig(fig, fname, *args, **kwargs):
+        if "format" not in kwargs and isinstance(fname, str):
+            kwargs["format"] = os.path.splitext(fname)[1][1:] or None
+        buffer = io.BytesIO()
+        with profiling.stage("encode"):
+            original_savefig(fig, buffer, *args, **kwargs)
+        outputs.append((os.path.basename(str(fname)), buffer.getvalue()))
+
+    matplotlib.figure.Figure.savefig = capture_savefig
+    plt.show = lambda *args, **kwargs: None
+    error = None
+    start = time.perf_counter()
+    try:
+        with plt.rc_context(), profiling.context(pt=os.path.basename(path)), profiling.stage("script"):
+            runpy.run_path(path, run_name="__main__")
+    except Exception as exc:
+        error = "".join(traceback.format_exception_only(type(exc), exc)).strip()
+    finally:
+        elapsed = time.perf_counter() - start
+        matplotlib.figure.Figure.savefig = original_savefig
+        plt.show = original_show
+        plt.close("all")
+
+    return {
+        "script": os.path.basename(path),
+        "seconds": elapsed,
+        "outputs": outputs,
+        "error": error,
+        "cached": False,
+        "events": profiling.drain(),
+    }
+
+
+def write_outputs(result, out_dir):
+    """Writes the captured images of one result and returns the paths written."""
+    written = []
+    for name, data in result["outputs"]:
+        target = os.path.join(out_dir, name)
+        with open(target, "wb") as f:
+            f.write(data)
+        written.append(target)
+    return written
+
+
+def print_report(results, total_seconds):
+    failures = [r for r in results if r["error"]]
+    owners = {}
+    for r in results:
+        status = "FAIL" if r["error"] else "hit" if r["cached"] else "ok"
+        names = ", ".join(name for name, _ in r["outputs"]) or "-"
+        print(f"{r['seconds']:8.2f}s  {status:<4}  {r['script']}  ->  {names}")
+        if r["error"]:
+            print(f"{'':16}{r['error']}")
+        for name, data in r["outputs"]:
+            owners.setdefault(name, []).append((r["script"], data))
+
+    # Two scripts writing different images under one file name overwrite each other
+    for name, writers in sorted(owners.items()):
+        if len({data for _, data in writers}) > 1:
+            scripts = ", ".join(script for script, _ in writers)
+            print(f"warning: {name} is written with different content by {len(writers)} scripts: {scripts}")
+
+    print(f"\n{len(results)} scripts, {len(failures)} failed, {total_seconds:.2f}s total")
+
+
+def warm_worker(profile=False, cache_dir=None):
+    """Pool initializer: loads the font cache and Agg renderer before the first script."""
+    # Every PT script needs numpy and most pull in scipy.stats
+    importlib.import_module("numpy")
+    importlib.import_module("scipy.stats")
+    if profile:
+        profiling.enable()
+    if cache_dir is not None:
+        os.environ[CACHE_DIR_ENV] = cache_dir
+    fig = plt.figure(figsize=(1, 1))
+    fig.text(0.5, 0.5, "warm")
+    fig.savefig(io.BytesIO(), format="png")
+    plt.close(fig)
+
+
+def run_uncached(paths, jobs):
+    if jobs <= 1:
+        return [run_script(path) for path in paths]
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs, initializer=warm_worker,
+                                                initargs=(profiling.enabled(), os.environ.get(CACHE_DIR_ENV))) as pool:
+        # map() yields in submission order, which keeps the write order deterministic
+        return list(pool.map(run_script, paths))
+
+
+def run_batch(paths, out_dir=DEFAULT_OUT_DIR, jobs=1, cache=None):
+    os.makedirs(out_dir, exist_ok=True)
+    results = [None] * len(paths)
+    keys = [None] * len(paths)
+    if cache is not None:
+        for i, path in enumerate(paths):
+            keys[i] = script_key(path)
+            outputs = cache.get(keys[i])
+            if outputs is not None:
+                results[i] = {"script": os.path.basename(path), "seconds": 0.0,
+                              "outputs": outputs, "error": None, "cached": True}
+
+    pending = [i for i, result in enumerate(results) if result is None]
+    if cache is not None:
+        cache.save()  # Stores the size cap before the scripts add their base layers
+    previous = os.environ.get(CACHE_DIR_ENV)
+    os.environ[CACHE_DIR_ENV] = cache.cache_dir if cache is not None else ""
+    try:
+        uncached = run_uncached([paths[i] for i in pending], jobs)
+    finally:
+        if previous is None:
+            del os.environ[CACHE_DIR_ENV]
+        else:
+            os.environ[CACHE_DIR_ENV] = previous
+    for i, result in zip(pending, uncached):
+        results[i] = result
+        profiling.extend(result.pop("events"))
+        if cache is not None and not result["error"]:
+            cache.put(keys[i], result["outputs"])
+
+    for result in results:
+        write_outputs(result, out_dir)
+    if cache is not None:
+        cache.save()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render every PT script in one warm interpreter.")
+    parser.add_argument("scripts", nargs="*", help="Scripts to run (default: every PT script)")
+    parser.add_argument("--out-dir", default=DEFAULT_OUT_DIR, help="Directory for the rendered images")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Number of worker processes (0 = one per CPU core)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Directory of the render cache")
+    parser.add_argument("--cache-max-mb", type=float, default=DEFAULT_MAX_BYTES / 1e6,
+                        help="Size cap of the render cache; least recently used entries are evicted")
+    parser.add_argument("--profile", metavar="TRACE_JSON",
+                        help="Time each script and its encode step, print totals and write a Chrome trace")
+    parser.add_argument("--no-cache", action="store_true", help="Render every script even if it is cached")
+    args = parser.parse_args(argv)
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count() or 1
+
+    if args.profile:
+        profiling.enable()
+    paths = args.scripts or find_scripts(os.path.dirname(os.path.abspath(__file__)))
+    cache = None if args.no_cache else RenderCache(args.cache_dir, int(args.cache_max_mb * 1e6))
+    start = time.perf_counter()
+    results = run_batch(paths, args.out_dir, jobs, cache)
+    print_report(results, time.perf_counter() - start)
+    if args.profile:
+        profiling.print_summary()
+        profiling.write_chrome_trace(args.profile)
+    return 1 if any(r["error"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
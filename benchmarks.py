@@ -0,0 +1,210 @@
+import argparse
+import copy
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+from pt_spec import render
+from render_cache import library_versions
+
+# Benchmarks for the PT rendering pipeline.
+#
+# Each representative template is rendered end to end (sample, bin, fit, draw and
+# encode every variant) from its spec with the base-layer cache disabled, so a run
+# measures the real work. The sweeps vary one setting at a time around the default
+# point (1e3 samples, 15 bins, 300 dpi, PNG):
+#
+#   num_samples  1e3 .. 1e6 (1e7 and 1e8 with --full)
+#   bins         10, 15, 30, 100
+#   dpi          72, 150, 300
+#   format       png, svg, pdf
+#
+# Time is the best of --repeat runs; peak memory comes from one extra run under
+# tracemalloc (numpy reports its buffers to tracemalloc, matplotlib's C++ renderer
+# does not). Results are saved as JSON, and "compare" flags every point that got
+# slower or bigger than a stored baseline by more than a threshold.
+#
+#   python benchmarks.py run --out baseline.json
+#   python benchmarks.py run --out current.json
+#   python benchmarks.py compare baseline.json current.json --threshold 0.10
+
+SPEC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "specs")
+
+TEMPLATES = {
+    "105436-normal": "pt_105436.json",
+    "105608-skewnorm-fit": "pt_105608.json",
+    "105610-mixture": "pt_105610.json",
+    "105672-table": "pt_105672.json",
+    "105573-uniform": "pt_105573.json",
+}
+
+DEFAULT_POINT = {"num_samples": 1000, "bins": 15, "dpi": 300, "format": "png"}
+
+SWEEPS = {
+    "num_samples": [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6],
+    "bins": [10, 15, 30, 100],
+    "dpi": [72, 150, 300],
+    "format": ["png", "svg", "pdf"],
+}
+FULL_SAMPLES = [10 ** 7, 10 ** 8]
+
+DEFAULT_THRESHOLD = 0.10
+# Timings below this are dominated by noise and never count as regressions
+MIN_SECONDS = 0.05
+
+
+def load_template(name):
+    with open(os.path.join(SPEC_DIR, TEMPLATES[name])) as f:
+        return json.load(f)
+
+
+def scale_data(data_spec, num_samples):
+    """Resizes one panel's data spec to num_samples observations."""
+    if data_spec["dist"] == "table":
+        total = sum(data_spec["freqs"])
+        data_spec["freqs"] = [round(freq * num_samples / total) for freq in data_spec["freqs"]]
+    elif data_spec["dist"] == "mixture":
+        total = sum(c["size"] for c in data_spec["components"])
+        for component in data_spec["components"]:
+            component["size"] = round(component["size"] * num_samples / total)
+    else:
+        data_spec.pop("size", None)
+
+
+def configure(spec, num_samples, bins, dpi, format):
+    """Returns a copy of spec rendered at the given settings."""
+    spec = copy.deepcopy(spec)
+    spec.setdefault("defaults", {}).update(num_samples=num_samples, bins=bins)
+    for panel in spec["panels"]:
+        panel.pop("num_samples", None)
+        panel.pop("bins", None)
+        scale_data(panel["data"], num_samples)
+    spec["figure"]["dpi"] = dpi
+    for variant in spec["variants"]:
+        variant["output"] = os.path.splitext(variant["output"])[0] + "." + format
+    return spec
+
+
+def points(full=False):
+    """Yields every (num_samples, bins, dpi, format) setting of the sweeps, once."""
+    seen = set()
+    for axis, values in SWEEPS.items():
+        if axis == "num_samples" and full:
+            values = values + FULL_SAMPLES
+        for value in values:
+            point = {**DEFAULT_POINT, axis: value}
+            key = tuple(point.values())
+            if key not in seen:
+                seen.add(key)
+                yield point
+
+
+def measure(spec, repeat):
+    """Returns (best seconds, peak MB) for rendering every variant of spec."""
+    with tempfile.TemporaryDirectory() as out_dir:
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            render(spec, out_dir, cache_dir=None)
+            best = min(best, time.perf_counter() - start)
+
+        tracemalloc.start()
+        try:
+            render(spec, out_dir, cache_dir=None)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        plt.close("all")
+    return best, peak / 2 ** 20
+
+
+def run(templates, repeat=3, full=False):
+    results = []
+    for name in templates:
+        template = load_template(name)
+        for point in points(full):
+            seconds, peak_mb = measure(configure(template, **point), repeat)
+            results.append({"template": name, **point, "seconds": seconds, "peak_mb": peak_mb})
+            print(f"{name:<22}{point['num_samples']:>11}{point['bins']:>6}{point['dpi']:>6}{point['format']:>6}"
+                  f"{seconds:>10.3f}s{peak_mb:>10.1f}MB", flush=True)
+    return {
+        "meta": {
+            "versions": library_versions(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "repeat": repeat,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def result_key(result):
+    return result["template"], result["num_samples"], result["bins"], result["dpi"], result["format"]
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """Returns [(key, metric, old, new), ...] for every metric that grew by more than threshold."""
+    old_results = {result_key(result): result for result in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        old = old_results.get(result_key(result))
+        if old is None:
+            continue
+        for metric in ("seconds", "peak_mb"):
+            if metric == "seconds" and result[metric] < MIN_SECONDS:
+                continue
+            if result[metric] > old[metric] * (1 + threshold):
+                regressions.append((result_key(result), metric, old[metric], result[metric]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the PT rendering pipeline.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the sweeps and save the results as JSON")
+    run_parser.add_argument("--out", default="benchmark_results.json", help="Results file to write")
+    run_parser.add_argument("--templates", nargs="+", choices=sorted(TEMPLATES), default=list(TEMPLATES),
+                            help="Templates to benchmark (default: all)")
+    run_parser.add_argument("--repeat", type=int, default=3, help="Timed runs per point; the best is kept")
+    run_parser.add_argument("--full", action="store_true", help="Also run 1e7 and 1e8 samples")
+
+    compare_parser = commands.add_parser("compare", help="Flag regressions against a baseline")
+    compare_parser.add_argument("baseline", help="Results JSON of the reference run")
+    compare_parser.add_argument("current", help="Results JSON of the run to check")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                                help="Relative growth that counts as a regression (default: 0.10)")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        results = run(args.templates, args.repeat, args.full)
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nWrote {len(results['results'])} results to {args.out}")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    if baseline["meta"]["versions"] != current["meta"]["versions"]:
+        print("note: library versions differ between the two runs")
+    regressions = compare(baseline, current, args.threshold)
+    for key, metric, old, new in regressions:
+        print(f"REGRESSION {' '.join(map(str, key))}: {metric} {old:.3f} -> {new:.3f} ({new / old - 1:+.0%})")
+    print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
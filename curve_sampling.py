@@ -0,0 +1,146 @@
+import copy
+import glob
+import json
+import os
+import sys
+
+import numpy as np
+
+# Adaptive x-grids for the overlay curves.
+#
+# Overlays are drawn through a fixed np.linspace grid of 500-1000 points, although
+# most of a density is close to straight at the scale of one pixel: the tails, the
+# flanks of a wide normal, a flat line. Here the grid is refined only where the curve
+# bends. Starting from INITIAL_POINTS evenly spaced points, every segment is tested
+# at its midpoint and split when the midpoint lies more than TOLERANCE_PX away from
+# the segment's chord; all midpoints of one round go through a single pdf call.
+#
+# Pixel distances are measured against conservative axes sizes (the whole figure
+# cell of a panel at the target dpi, y scaled by the curve's peak), so the true
+# distance is never larger. Segments are never split below the spacing of the
+# uniform grid they replace, so an adaptive curve never has finer detail than the
+# fixed grid did.
+#
+# Run this module to compare adaptive and uniform curves for every spec overlay.
+
+INITIAL_POINTS = 33
+TOLERANCE_PX = 0.5
+
+
+def axes_pixels(figure):
+    """An upper bound on the (width, height) of one panel in pixels at the figure's dpi."""
+    fig_w, fig_h = figure.get("figsize", [12, 10])
+    dpi = figure.get("dpi", 300)
+    return fig_w * dpi / figure.get("ncols", 2), fig_h * dpi / figure.get("nrows", 2)
+
+
+def adaptive_grid(f, lo, hi, max_points, pixels, tolerance=TOLERANCE_PX):
+    """Samples y = f(x) on [lo, hi] so the polyline stays within tolerance pixels of the curve.
+
+    f must accept an array of x values. pixels is the (width, height) the x range and
+    the curve's peak are drawn over. Returns (x, y).
+    """
+    if max_points <= INITIAL_POINTS or hi <= lo:
+        x = np.linspace(lo, hi, max_points)
+        return x, f(x)
+    x = np.linspace(lo, hi, INITIAL_POINTS)
+    y = f(x)
+    min_width = (hi - lo) / (max_points - 1)
+    x_scale = pixels[0] / (hi - lo)
+    active = np.flatnonzero(np.diff(x) > min_width)
+    while len(active):
+        a, b = x[active], x[active + 1]
+        ya, yb = y[active], y[active + 1]
+        mid = (a + b) / 2
+        y_mid = f(mid)
+        peak = max(np.max(np.abs(y)), np.max(np.abs(y_mid)))
+        if peak == 0:
+            break
+        y_scale = pixels[1] / peak
+
+        # Distance of the midpoint from the chord, in pixels
+        dx = (b - a) * x_scale
+        dy = (yb - ya) * y_scale
+        offset = np.abs(y_mid - (ya + yb) / 2) * y_scale
+        split = offset * dx / np.hypot(dx, dy) > tolerance
+
+        at = active[split]
+        x = np.insert(x, at + 1, mid[split])
+        y = np.insert(y, at + 1, y_mid[split])
+        # Both halves of a split segment are tested again, unless they reached the uniform spacing
+        left = at + np.arange(len(at))
+        halves = np.concatenate([left, left + 1])
+        active = np.sort(halves[np.diff(x)[halves] > min_width])
+    return x, y
+
+
+# --- Comparison with the uniform grids ---
+def polyline_distance(points, x, y, window=64):
+    """Largest distance from any of points (n x 2) to the polyline (x, y), x increasing.
+
+    Only the window segments on either side of each point's x position are searched.
+    """
+    start = np.column_stack([x[:-1], y[:-1]])
+    seg = np.column_stack([np.diff(x), np.diff(y)])
+    near = np.searchsorted(x, points[:, 0])[:, None] + np.arange(-window, window)[None, :]
+    near = np.clip(near, 0, len(seg) - 1)
+    rel = points[:, None, :] - start[near]
+    t = np.clip(np.sum(rel * seg[near], axis=2) / np.maximum(np.sum(seg * seg, axis=1)[near], 1e-300), 0, 1)
+    nearest = rel - t[..., None] * seg[near]
+    return np.sqrt(np.min(np.sum(nearest * nearest, axis=2), axis=1)).max()
+
+
+def _pixel_curves(curves, counts, pixels):
+    # Pixel scale of the real axes limits: x range of the curve, y up to 105% of the tallest
+    scaled = []
+    for panel_counts, (x, y) in zip(counts, curves):
+        sx = pixels[0] / (x[-1] - x[0])
+        sy = pixels[1] / (1.05 * max(panel_counts.max(), y.max()))
+        scaled.append(np.column_stack([x * sx, y * sy]))
+    return scaled
+
+
+def _deviation(a_curves, b_curves):
+    return max(max(polyline_distance(a, *b.T), polyline_distance(b, *a.T)) for a, b in zip(a_curves, b_curves))
+
+
+def compare_spec(spec):
+    """Prints points and pixel deviations of adaptive and uniform curves for every variant.
+
+    The exact curve is a uniform grid 16 times denser. Returns False when an adaptive
+    curve is more than 1px from the exact curve, or further from today's curve than
+    1px plus today's own error.
+    """
+    from pt_spec import evaluate_overlay, sample_panels
+
+    base = sample_panels(spec)
+    pixels = axes_pixels(spec["figure"])
+    ok = True
+    for variant in spec["variants"]:
+        overlay = variant.get("overlay")
+        if not overlay or overlay.get("dist") == "flat":
+            continue
+        points = overlay.get("points", 500)
+        curves = {sampling: evaluate_overlay({**copy.deepcopy(overlay), "sampling": sampling}, spec, base)
+                  for sampling in ("uniform", "adaptive")}
+        curves["exact"] = evaluate_overlay({**copy.deepcopy(overlay), "sampling": "uniform", "points": 16 * points},
+                                           spec, base)
+        scaled = {name: _pixel_curves(c, base[1], pixels) for name, c in curves.items()}
+        today = _deviation(scaled["uniform"], scaled["exact"])
+        adaptive = _deviation(scaled["adaptive"], scaled["exact"])
+        between = _deviation(scaled["adaptive"], scaled["uniform"])
+        variant_ok = adaptive <= 1.0 and between <= 1.0 + today
+        ok &= variant_ok
+        print(f"{spec['id']:<8}{variant['name']:<22}{sum(len(x) for x, _ in curves['uniform']):>6} ->"
+              f"{sum(len(x) for x, _ in curves['adaptive']):>5} points   from exact: uniform {today:5.2f}px, "
+              f"adaptive {adaptive:5.2f}px   adaptive vs uniform {between:5.2f}px  {'ok' if variant_ok else 'FAIL'}")
+    return ok
+
+
+if __name__ == "__main__":
+    spec_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "specs")
+    ok = True
+    for path in sorted(glob.glob(os.path.join(spec_dir, "*.json"))):
+        with open(path) as f:
+            ok &= compare_spec(json.load(f))
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,152 @@
+import sys
+import timeit
+import weakref
+
+import numpy as np
+from scipy import stats
+
+from freq_table import FrequencyTable
+from streaming import StreamedTable
+
+# Per-dataset summary statistics, computed once.
+#
+# Overlays ask the same questions of a panel's data over and over: "moments" params
+# need the mean and std, every "shift" the std again, x ranges the min and max, and
+# each call used to rescan the array (and each hand-written script does it with its
+# own np.mean / np.std / builtin min and max calls). describe() computes count, min,
+# max, mean, variance, skewness and excess kurtosis together, reusing the deviations
+# from the mean for every central moment, and memoizes the result per dataset object
+# until that object is garbage collected (datasets are not modified once sampled).
+#
+# Mean and std are bit-identical to np.mean and np.std, so cached and uncached code
+# paths draw the same curves. Frequency tables use their frequency-weighted moments,
+# streamed tables the running moments of the stream.
+
+_cache = {}
+
+
+class DatasetStats:
+    """count, min, max, mean, variance (population), std, skewness and excess kurtosis."""
+
+    def __init__(self, count, min, max, mean, variance, skewness, kurtosis):
+        self.count = count
+        self.min = min
+        self.max = max
+        self.mean = mean
+        self.variance = variance
+        self.std = float(np.sqrt(variance))
+        self.skewness = skewness
+        self.kurtosis = kurtosis
+
+    def __repr__(self):
+        return (f"DatasetStats(count={self.count}, min={self.min:.6g}, max={self.max:.6g}, mean={self.mean:.6g}, "
+                f"std={self.std:.6g}, skewness={self.skewness:.4f}, kurtosis={self.kurtosis:.4f})")
+
+
+def _shape(count, m2, m3, m4):
+    """Skewness and excess kurtosis from central sums; 0 for constant data."""
+    if m2 <= 0:
+        return 0.0, 0.0
+    return float(np.sqrt(count) * m3 / m2 ** 1.5), float(count * m4 / (m2 * m2) - 3)
+
+
+def compute(data):
+    """DatasetStats of raw samples, a FrequencyTable or a StreamedTable, without caching."""
+    if isinstance(data, StreamedTable):
+        histogram = data.histogram
+        count, mean, m2, m3, m4 = histogram.moments
+        return DatasetStats(count, histogram.min, histogram.max, mean, histogram.variance, *_shape(count, m2, m3, m4))
+    if isinstance(data, FrequencyTable):
+        mean, std = data.mean_std()
+        weights = np.asarray(data.freqs, dtype=float)
+        d2 = (data.centers - mean) ** 2
+        m3, m4 = np.dot(weights, d2 * (data.centers - mean)), np.dot(weights, d2 * d2)
+        count = int(weights.sum())
+        return DatasetStats(count, float(data.min()), float(data.max()), float(mean), float(std) ** 2,
+                            *_shape(count, std ** 2 * count, m3, m4))
+    data = np.asarray(data, dtype=float)
+    count = len(data)
+    mean = np.mean(data)
+    d = data - mean
+    d2 = d * d
+    # sum(d2) / n is exactly np.var's arithmetic, so std matches np.std
+    m2 = float(d2.sum())
+    m3, m4 = float(np.dot(d2, d)), float(np.dot(d2, d2))
+    return DatasetStats(count, float(data.min()), float(data.max()), float(mean), m2 / count,
+                        *_shape(count, m2, m3, m4))
+
+
+def describe(data):
+    """Memoized DatasetStats of a dataset; the entry lives as long as the dataset object.
+
+    Lists, tuples and other objects that cannot be weakly referenced are not cached:
+    nothing would drop their entry, and their id could come back for other data.
+    """
+    key = id(data)
+    if key not in _cache:
+        try:
+            weakref.finalize(data, _cache.pop, key, None)
+        except TypeError:
+            return compute(data)
+        _cache[key] = compute(data)
+    return _cache[key]
+
+
+# --- Check and benchmark ---
+def check(rng):
+    failures = 0
+    for name, data in [("normal", rng.normal(50, 10, 1000)),
+                       ("skewnorm", stats.skewnorm.rvs(-5, 90, 5, size=1500, random_state=rng)),
+                       ("lomax", rng.pareto(1.5, 100_000) * 1e5)]:
+        s = describe(data)
+        identical = s.mean == np.mean(data) and s.std == np.std(data) and (s.min, s.max) == (min(data), max(data))
+        error = max(abs(s.skewness - stats.skew(data)) / abs(stats.skew(data)),
+                    abs(s.kurtosis - stats.kurtosis(data)) / abs(stats.kurtosis(data)))
+        ok = identical and error < 1e-9 and describe(data) is s
+        failures += not ok
+        print(f"{'ok' if ok else 'FAIL':<4}  {name:<9} mean/std/min/max identical: {identical}, "
+              f"shape relative error {error:.1e}")
+
+    table = FrequencyTable([1, 2, 3, 4, 5], [3, 10, 25, 10, 2])
+    repeated = np.repeat(table.centers, table.freqs)
+    s = describe(table)
+    ok = (np.allclose([s.mean, s.std, s.skewness, s.kurtosis],
+                      [np.mean(repeated), np.std(repeated), stats.skew(repeated), stats.kurtosis(repeated)])
+          and (s.count, s.min, s.max) == (50, 1, 5))
+    failures += not ok
+    print(f"{'ok' if ok else 'FAIL':<4}  table     matches the repeated values: {ok}")
+
+    values = [3.0, 1.0, 4.0, 1.0, 5.0, 9.0]
+    entries = len(_cache)
+    plain = [describe(values), describe(tuple(values))]
+    ok = all(np.isclose(p.mean, np.mean(values)) and np.isclose(p.std, np.std(values)) for p in plain)
+    ok &= len(_cache) == entries
+    failures += not ok
+    print(f"{'ok' if ok else 'FAIL':<4}  list      and tuple described, not cached: {ok}")
+
+    del data, table, repeated, s
+    print(f"{'ok' if len(_cache) < entries else 'FAIL':<4}  entries dropped with their datasets: {entries} -> {len(_cache)}")
+    return failures + (len(_cache) >= entries)
+
+
+def benchmark(rng, n=1500):
+    data = rng.normal(50, 10, n)
+
+    def rescans():
+        # What the overlay helpers did: each asks for its own statistics
+        for _ in range(3):
+            np.mean(data), np.std(data), min(data), max(data)
+        stats.skew(data), stats.kurtosis(data)
+
+    separate = min(timeit.repeat(rescans, number=100, repeat=3)) / 100
+    once = min(timeit.repeat(lambda: compute(data), number=100, repeat=3)) / 100
+    cached = min(timeit.repeat(lambda: describe(data), number=1000, repeat=3)) / 1000
+    print(f"\n{n} samples: separate rescans {separate * 1e6:.0f}us, one compute {once * 1e6:.0f}us, "
+          f"cached lookup {cached * 1e6:.2f}us")
+
+
+if __name__ == "__main__":
+    generator = np.random.default_rng(0)
+    failed = check(generator)
+    benchmark(generator)
+    sys.exit(1 if failed else 0)
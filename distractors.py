@@ -0,0 +1,222 @@
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import matplotlib
+import matplotlib.pyplot as plt
+from scipy import special
+
+import curve_sampling
+from base_layers import load_base, render_variants
+from dataset_stats import describe
+from pt_spec import build_base, kde_transform, output_name, overlay_settings, resolve_params, scaled_curves
+from render_cache import DEFAULT_CACHE_DIR
+
+# Distractor families generated from the correct overlay.
+#
+# Every incorrect answer used to be written by hand: the offset curve of PT 105436,
+# the thin curves of PT 105609, the flat line of PT 105661, the bell curve over the
+# bimodal data of PT 105610. They are all the same few edits of the correct curve, so
+# here they are transforms of its resolved parameters, panel by panel:
+#
+#   shift      the curve moved by SHIFT_SD standard deviations of the data
+#   rescale    the curve narrowed to RESCALE times its scale ("thin curves")
+#   flip_skew  a skew normal with the data's mean and std, skewed the other way
+#   kurtosis   a generalized normal with the data's mean and std, flat-topped for
+#              peaked data and peaked for flat data
+#   modality   one normal for a mixture, two separated normals otherwise
+#   flatten    the flat line at the average bar height
+#   ushape     a parabola over the bars
+#
+# The whole family is evaluated in one scaled_curves call: every distractor uses the
+# correct overlay's x grid, so panels of the same distribution across all
+# distractors are stacked into one broadcast pdf call.
+#
+#   python distractors.py specs/pt_105436.json --out-dir out
+
+SHIFT_SD = 1.5
+RESCALE = 0.5
+SKEW_SHAPE = 5.0  # |a| of the flipped skew normal
+FLAT_TOP_BETA = 5.0  # gennorm shape for a flat-topped curve (as PT 105684)
+PEAKED_BETA = 1.0  # gennorm shape for a peaked, Laplace-like curve
+SYMMETRIC_SKEW = 0.2  # Data with |skewness| below this counts as symmetric
+
+DEFAULT_TRANSFORMS = ["shift", "rescale", "flip_skew", "kurtosis", "modality", "flatten", "ushape"]
+MAX_DISTRACTORS = 6
+
+
+def _move(settings, params, data, shift=0.0, factor=1.0):
+    """The correct curve shifted by shift data standard deviations and/or its scale times factor."""
+    if settings["dist"] == "kde":
+        return settings, kde_transform({"shift": shift, "scale_factor": factor}, params, data)
+    std = describe(data).std
+    targets = params["components"] if settings["dist"] == "mixture" else [params]
+    for target in targets:
+        target["loc"] = target.get("loc", 0) + shift * std
+        target["scale"] = target.get("scale", 1) * factor
+    if settings["dist"] == "mixture" and factor != 1:
+        # Narrow the whole mixture, not only its components
+        center = describe(data).mean
+        for target in targets:
+            target["loc"] = center + (target["loc"] - center) * factor
+    return settings, params
+
+
+def shift(settings, params, data):
+    return _move(settings, params, data, shift=SHIFT_SD)
+
+
+def rescale(settings, params, data):
+    return _move(settings, params, data, factor=RESCALE)
+
+
+def flip_skew(settings, params, data):
+    """A skew normal with the data's mean and std and the opposite skew."""
+    described = describe(data)
+    if settings["dist"] == "skewnorm":
+        a = -params["a"]
+    elif described.skewness > SYMMETRIC_SKEW:
+        a = -SKEW_SHAPE
+    else:
+        a = SKEW_SHAPE
+    delta = a / np.sqrt(1 + a * a)
+    scale = described.std / np.sqrt(1 - 2 * delta * delta / np.pi)
+    loc = described.mean - scale * delta * np.sqrt(2 / np.pi)
+    return {**settings, "dist": "skewnorm"}, {"a": a, "loc": loc, "scale": scale}
+
+
+def kurtosis(settings, params, data):
+    """A generalized normal with the data's mean and std and the opposite tail weight."""
+    described = describe(data)
+    beta = FLAT_TOP_BETA if described.kurtosis > -0.5 else PEAKED_BETA
+    scale = described.std * np.sqrt(special.gamma(1 / beta) / special.gamma(3 / beta))
+    return {**settings, "dist": "gennorm"}, {"beta": beta, "loc": described.mean, "scale": scale}
+
+
+def modality(settings, params, data):
+    """One normal with the data's moments for a mixture; otherwise two normals a std either side of the mean."""
+    described = describe(data)
+    if settings["dist"] == "mixture":
+        return {**settings, "dist": "norm"}, {"loc": described.mean, "scale": described.std}
+    components = [{"dist": "norm", "weight": 0.5, "loc": described.mean + side * described.std,
+                   "scale": 0.45 * described.std} for side in (-1, 1)]
+    return {**settings, "dist": "mixture"}, {"components": components}
+
+
+def flatten(settings, params, data):
+    return {**settings, "dist": "flat"}, {}
+
+
+def ushape(settings, params, data):
+    return {**settings, "dist": "ushape"}, {}
+
+
+TRANSFORMS = {
+    "shift": shift,
+    "rescale": rescale,
+    "flip_skew": flip_skew,
+    "kurtosis": kurtosis,
+    "modality": modality,
+    "flatten": flatten,
+    "ushape": ushape,
+}
+
+
+def applicable(name, correct_dist):
+    """Whether a transform gives a curve that differs from a correct one of correct_dist."""
+    # Flat lines and parabolas have no location or scale to move
+    if correct_dist == "flat":
+        return name not in ("shift", "rescale", "flatten")
+    if correct_dist == "ushape":
+        return name not in ("shift", "rescale", "ushape")
+    return True
+
+
+def evaluate_family(spec, base, correct, transforms=None):
+    """Curves of every distractor of the correct overlay: {name: [(x, y), ...] per panel}.
+
+    transforms defaults to the first MAX_DISTRACTORS applicable ones of DEFAULT_TRANSFORMS.
+    """
+    datasets, counts, edges = base
+    n_panels = len(datasets)
+    correct_settings = [overlay_settings(correct, i) for i in range(n_panels)]
+    correct_params = [resolve_params(correct_settings[i], spec["panels"][i]["data"], datasets[i])
+                      for i in range(n_panels)]
+    if transforms is None:
+        transforms = [name for name in DEFAULT_TRANSFORMS
+                      if all(applicable(name, s["dist"]) for s in correct_settings)][:MAX_DISTRACTORS]
+
+    settings, params = [], []
+    for name in transforms:
+        for i in range(n_panels):
+            s, p = TRANSFORMS[name](dict(correct_settings[i]), copy.deepcopy(correct_params[i]), datasets[i])
+            # Shared x grid: the correct overlay's range and points for every distractor
+            settings.append({**s, "x": correct_settings[i]["x"], "points": correct_settings[i]["points"]})
+            params.append(p)
+    curves = scaled_curves(settings, params, datasets * len(transforms), counts * len(transforms),
+                           edges * len(transforms), curve_sampling.axes_pixels(spec["figure"]))
+    return {name: curves[k * n_panels:(k + 1) * n_panels] for k, name in enumerate(transforms)}
+
+
+def correct_overlay(spec):
+    variant = next((v for v in spec["variants"] if v.get("name") == "correct"), None)
+    if variant is None or "overlay" not in variant:
+        raise ValueError(f"PT {spec['id']} has no \"correct\" variant with an overlay")
+    return variant["overlay"]
+
+
+def render(spec, out_dir=".", transforms=None, student=None, cache_dir=DEFAULT_CACHE_DIR):
+    """Renders one image per distractor of the spec's correct variant; returns the paths written."""
+    correct = correct_overlay(spec)
+    spec_text = json.dumps(spec, sort_keys=True)
+    fig, base = load_base(build_base, spec_text, student, cache_dir=cache_dir)
+    family = evaluate_family(spec, base, correct, transforms)
+
+    def drawer(curves):
+        def draw(axes, _):
+            axes.flat[0].figure.suptitle(spec["figure"]["suptitle"], fontsize=spec["figure"].get("suptitle_fontsize", 16))
+            for i, (ax, (x, y)) in enumerate(zip(axes.flat, curves)):
+                settings = overlay_settings(correct, i)
+                ax.plot(x, y, color=settings["color"], linewidth=settings["linewidth"])
+        return draw
+
+    variants = [(os.path.join(out_dir, output_name(f"pt_{spec['id']}_auto_{name}.png", student)), drawer(curves))
+                for name, curves in family.items()]
+    rect = spec["figure"].get("tight_layout_rect")
+    written = render_variants(fig, base, variants, layout=lambda fig: fig.tight_layout(rect=rect),
+                              dpi=spec["figure"].get("dpi", 300), bbox_inches='tight')
+    plt.close(fig)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a family of distractors from each spec's correct overlay.")
+    parser.add_argument("specs", nargs="+", help="PT spec JSON files")
+    parser.add_argument("--out-dir", default=".", help="Directory for the rendered images")
+    parser.add_argument("--transforms", help=f"Comma-separated subset of {','.join(DEFAULT_TRANSFORMS)} "
+                                             f"(default: up to {MAX_DISTRACTORS} that apply)")
+    args = parser.parse_args(argv)
+
+    matplotlib.use("Agg")
+    os.makedirs(args.out_dir, exist_ok=True)
+    transforms = args.transforms.split(",") if args.transforms else None
+    for name in transforms or []:
+        if name not in TRANSFORMS:
+            parser.error(f"unknown transform {name!r}")
+    for path in args.specs:
+        with open(path) as f:
+            spec = json.load(f)
+        start = time.perf_counter()
+        written = render(spec, args.out_dir, transforms)
+        print(f"PT {spec['id']}: {len(written)} distractors in {time.perf_counter() - start:.2f}s")
+        for filename in written:
+            print(f"  {filename}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+import numpy as np
+
+# Frequency-table panels.
+#
+# Some PTs (105672) are given as tables of bin centers and frequencies. Drawing them
+# by rebuilding the raw data with np.repeat(centers, freqs) allocates one element per
+# respondent only to recount the bar heights the table already holds. These helpers
+# work on the table itself: the frequencies are the bar heights and the moments are
+# frequency-weighted.
+
+
+def get_bin_edges(bin_centers):
+    """Calculates the edges of histogram bins given their center points."""
+    bin_width = bin_centers[1] - bin_centers[0]
+    start_edge = bin_centers[0] - bin_width / 2
+    end_edge = bin_centers[-1] + bin_width / 2
+    return np.linspace(start_edge, end_edge, len(bin_centers) + 1)
+
+
+def weighted_mean_std(bin_centers, freqs):
+    """Mean and (population) standard deviation of a frequency table, matching
+    np.mean and np.std of np.repeat(bin_centers, freqs)."""
+    centers = np.asarray(bin_centers, dtype=float)
+    freqs = np.asarray(freqs, dtype=float)
+    mean = np.average(centers, weights=freqs)
+    std = np.sqrt(np.average((centers - mean) ** 2, weights=freqs))
+    return mean, std
+
+
+class FrequencyTable:
+    """A panel dataset given as bin centers and frequencies instead of raw samples."""
+
+    def __init__(self, bin_centers, freqs):
+        self.centers = np.asarray(bin_centers, dtype=float)
+        self.freqs = np.asarray(freqs)
+        self.edges = get_bin_edges(self.centers)
+
+    def __len__(self):
+        return int(self.freqs.sum())
+
+    def mean_std(self):
+        return weighted_mean_std(self.centers, self.freqs)
+
+    def min(self):
+        return self.centers[np.flatnonzero(self.freqs)[0]]
+
+    def max(self):
+        return self.centers[np.flatnonzero(self.freqs)[-1]]
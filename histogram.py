@@ -0,0 +1,114 @@
+import sys
+import timeit
+
+import numpy as np
+
+# Batched histograms.
+#
+# Personalized generation bins thousands of 1000-2000 sample arrays, and one
+# np.histogram call per array is mostly call overhead (argument checks, a sort-free
+# but per-call edge computation, a fresh bincount). batch_histogram bins a whole
+# (datasets x samples) array in one pass: every value gets its bin index by index
+# arithmetic, offset by row * bins, and a single bincount counts all rows at once.
+#
+# Counts and edges are identical to np.histogram(row, bins) for every row, including
+# its rounding corrections at the bin edges, so the pipeline can use either.
+
+
+def histogram_edges(data, bins):
+    """Per-row edges np.histogram would use for `bins` equal bins over each row's range."""
+    lo = data.min(axis=1).astype(float)
+    hi = data.max(axis=1).astype(float)
+    same = lo == hi
+    lo[same] -= 0.5
+    hi[same] += 0.5
+    # np.linspace(lo, hi, bins + 1), row by row and bit for bit
+    step = (hi - lo) / bins
+    edges = np.arange(bins + 1)[None, :] * step[:, None] + lo[:, None]
+    edges[:, -1] = hi
+    return edges
+
+
+def batch_histogram(data, bins, edges=None):
+    """Counts every row of a 2-D array into equal-width bins.
+
+    edges is either None (each row uses its own min-max range like np.histogram),
+    one shared array of bins + 1 uniform edges, or one such array per row. Values
+    outside a row's edges are not counted. Returns (counts, edges), both 2-D.
+    """
+    data = np.asarray(data, dtype=float)
+    n_rows = data.shape[0]
+    edges_given = edges is not None
+    if edges_given:
+        edges = np.broadcast_to(np.asarray(edges, dtype=float), (n_rows, bins + 1))
+    else:
+        edges = histogram_edges(data, bins)
+    lo = edges[:, :1]
+    hi = edges[:, -1:]
+
+    position = data - lo
+    position *= bins / (hi - lo)
+    index = position.astype(np.intp)
+    # position - index is the offset into the bin; only values within a hair of an edge
+    # can be in the wrong bin after rounding
+    position -= index
+    near = np.flatnonzero((position < 1e-6) | (position > 1 - 1e-6))
+    np.clip(index, 0, bins - 1, out=index)
+    index += np.arange(n_rows)[:, None] * bins
+
+    if len(near):
+        # Same corrections as np.histogram, which checks every value against its bin's
+        # edges. Row r's edges start at r * (bins + 1) in flat_edges, its bins at r * bins.
+        flat_edges = edges.ravel()
+        values = data.ravel()[near]
+        bin_index = index.ravel()[near]
+        row = bin_index // bins
+        bin_index -= values < flat_edges[bin_index + row]
+        bin_index += (values >= flat_edges[bin_index + row + 1]) & (bin_index - row * bins != bins - 1)
+        np.put(index, near, bin_index)
+
+    # With its own min-max range every value of a row is inside its edges
+    flat = index[(data >= lo) & (data <= hi)] if edges_given else index.ravel()
+    counts = np.bincount(flat, minlength=n_rows * bins).reshape(n_rows, bins)
+    return counts, np.array(edges)
+
+
+# --- Check and benchmark against np.histogram ---
+def check_against_numpy(rng):
+    cases = [
+        rng.normal(50, 10, (200, 1000)),
+        rng.exponential(1.5, (200, 1500)),
+        rng.integers(1, 7, (200, 1000)),
+        rng.integers(0, 3, (200, 1000)) * 0.1,
+        np.full((3, 100), 4.0),
+    ]
+    failures = 0
+    for data in cases:
+        for bins in (6, 15, 100):
+            counts, edges = batch_histogram(data, bins)
+            for row, row_counts, row_edges in zip(data, counts, edges):
+                expected_counts, expected_edges = np.histogram(row, bins)
+                failures += not (np.array_equal(row_counts, expected_counts) and
+                                 np.array_equal(row_edges, expected_edges))
+        if data.min() == data.max():
+            continue
+        shared = np.linspace(np.percentile(data, 5), np.percentile(data, 95), 11)
+        counts, _ = batch_histogram(data, 10, shared)
+        failures += not all(np.array_equal(c, np.histogram(row, shared)[0]) for c, row in zip(counts, data))
+    print(f"{'ok' if not failures else 'FAIL'}  batch_histogram matches np.histogram ({failures} mismatches)")
+    return failures
+
+
+def benchmark(rng, n_datasets=2000, n_samples=1500, bins=15):
+    data = rng.normal(0, 1, (n_datasets, n_samples))
+    loop = min(timeit.repeat(lambda: [np.histogram(row, bins) for row in data], number=1, repeat=3))
+    batch = min(timeit.repeat(lambda: batch_histogram(data, bins), number=1, repeat=3))
+    print(f"{n_datasets} x {n_samples} samples, {bins} bins: np.histogram loop {loop * 1e3:.0f}ms, "
+          f"batch {batch * 1e3:.0f}ms ({loop / batch:.1f}x)")
+
+
+if __name__ == "__main__":
+    generator = np.random.default_rng(0)
+    failed = check_against_numpy(generator)
+    benchmark(generator)
+    sys.exit(1 if failed else 0)
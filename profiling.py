@@ -0,0 +1,113 @@
+import contextlib
+import json
+import os
+import threading
+import time
+
+# Opt-in per-stage timing for the render pipeline.
+#
+# Pipeline code wraps each stage in `with profiling.stage("sample", panel=i):`.
+# While profiling is disabled (the default) stage() returns one shared no-op context
+# manager, so the only cost is a function call and a global lookup. Once enabled,
+# every stage records a complete event that can be summarized per PT or written as a
+# Chrome trace (load it in chrome://tracing or https://ui.perfetto.dev).
+#
+# Stages used by the pipeline: script, sample, bin, fit, pdf, draw, layout, encode.
+
+_enabled = False
+_events = []
+_labels = threading.local()
+_NULL = contextlib.nullcontext()
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def enabled():
+    return _enabled
+
+
+def _current_labels():
+    return getattr(_labels, "value", {})
+
+
+@contextlib.contextmanager
+def _labelled(labels):
+    previous = _current_labels()
+    _labels.value = {**previous, **labels}
+    try:
+        yield
+    finally:
+        _labels.value = previous
+
+
+def context(**labels):
+    """Attaches labels (such as pt= or variant=) to every stage recorded inside."""
+    if not _enabled:
+        return _NULL
+    return _labelled(labels)
+
+
+@contextlib.contextmanager
+def _timed(name, args):
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        end = time.perf_counter_ns()
+        _events.append({
+            "name": name,
+            "ts": start / 1000,
+            "dur": (end - start) / 1000,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": {**_current_labels(), **args},
+        })
+
+
+def stage(name, **args):
+    if not _enabled:
+        return _NULL
+    return _timed(name, args)
+
+
+def drain():
+    """Returns and clears the recorded events (used to ship them out of workers)."""
+    events = list(_events)
+    _events.clear()
+    return events
+
+
+def extend(events):
+    _events.extend(events)
+
+
+def summary(events=None):
+    """Total seconds per stage, grouped by the "pt" label (or "-" when unlabeled)."""
+    totals = {}
+    for event in _events if events is None else events:
+        pt = str(event["args"].get("pt", "-"))
+        stages = totals.setdefault(pt, {})
+        stages[event["name"]] = stages.get(event["name"], 0.0) + event["dur"] / 1e6
+    return totals
+
+
+def print_summary(events=None):
+    totals = summary(events)
+    names = sorted({name for stages in totals.values() for name in stages})
+    print(f"\n{'PT':<40}" + "".join(f"{name:>10}" for name in names))
+    for pt, stages in sorted(totals.items()):
+        print(f"{pt[:39]:<40}" + "".join(f"{stages.get(name, 0.0):>9.3f}s" for name in names))
+
+
+def write_chrome_trace(path, events=None):
+    trace = [{**event, "ph": "X", "cat": "render"} for event in (_events if events is None else events)]
+    with open(path, "w") as f:
+        json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
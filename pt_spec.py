@@ -0,0 +1,621 @@
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+import matplotlib
+import matplotlib.pyplot as plt
+from scipy import stats
+
+from base_layers import load_base, render_variants
+import curve_sampling
+from dataset_stats import describe
+from freq_table import FrequencyTable
+from histogram import batch_histogram
+import kde
+import mixture_fit
+from pdf_kernels import cdf, pdf
+import profiling
+from render_cache import DEFAULT_CACHE_DIR
+import seeding
+import skewnorm_fit
+import skewnorm_sampler
+import streaming
+import truncated
+
+# Declarative problem templates.
+#
+# A PT spec (see specs/*.json) describes one 2x2 problem template: the figure, the
+# distribution behind each panel, the bins, labels and colors, and every answer
+# variant as an overlay (the correct curve plus each distractor). The engine turns a
+# spec into one pipeline:
+#
+#   sample -> bin -> pdf -> draw
+#
+# Sampling and binning run once per PT and form the shared base layer (see
+# base_layers.py). Overlay curves are evaluated for all panels of a variant at once:
+# panels that use the same distribution are stacked into one (panels x points) grid
+# and go through a single broadcast call of the closed-form kernels in pdf_kernels.py.
+
+DISTRIBUTIONS = {
+    name: getattr(stats, name)
+    for name in ["norm", "skewnorm", "gamma", "laplace", "gennorm", "cosine", "expon", "lomax"]
+}
+
+# Dedicated estimators used instead of the generic scipy.stats fit
+FITTERS = {
+    "skewnorm": skewnorm_fit.fit,
+}
+
+# Samplers take the panel's random generator (see seeding.py). In legacy seed mode
+# that is one RandomState shared by the panels in order, which reproduces the data of
+# the matching hand-written script.
+SAMPLERS = {
+    "norm": lambda rng, n, loc=0, scale=1: rng.normal(loc, scale, n),
+    "laplace": lambda rng, n, loc=0, scale=1: rng.laplace(loc, scale, n),
+    "expon": lambda rng, n, loc=0, scale=1: loc + rng.exponential(scale, n),
+    "gamma": lambda rng, n, a, loc=0, scale=1: loc + rng.gamma(a, scale, n),
+    "lomax": lambda rng, n, c, loc=0, scale=1: loc + rng.pareto(c, n) * scale,
+    "skewnorm": skewnorm_sampler.sample,
+    "randint": lambda rng, n, low, high: seeding.integers(rng, low, high, n),
+}
+
+PANEL_DEFAULTS = {
+    "num_samples": 1000,
+    "bins": 15,
+    "alpha": 0.7,
+    "edgecolor": "black",
+}
+
+OVERLAY_DEFAULTS = {
+    "params": "true",
+    "x": "data",
+    "points": 500,
+    "sampling": "uniform",
+    "normalize": "peak",
+    "style": "curve",
+    "color": "black",
+    "linewidth": 2,
+}
+
+
+def param_names(dist):
+    shapes = DISTRIBUTIONS[dist].shapes
+    return ([name.strip() for name in shapes.split(",")] if shapes else []) + ["loc", "scale"]
+
+
+def panel_settings(spec, i):
+    return {**PANEL_DEFAULTS, **spec.get("defaults", {}), **spec["panels"][i]}
+
+
+def overlay_settings(overlay, i):
+    settings = {**OVERLAY_DEFAULTS, **overlay}
+    per_panel = settings.pop("panels", None)
+    if per_panel:
+        settings.update(per_panel[i])
+    return settings
+
+
+# --- Stage 1: sample ---
+def sample(data_spec, num_samples, rng):
+    if data_spec["dist"] == "table":
+        # Frequency tables are used as given: no samples are materialized
+        return FrequencyTable(data_spec["centers"], data_spec["freqs"])
+    # "truncate": [low, high] draws from the distribution conditioned on that range (see
+    # truncated.py), unlike "clip", which piles everything outside onto the bounds.
+    # Bounds are in output units, so they are reflected along with the data.
+    bounds = data_spec.get("truncate")
+    if bounds is not None and "reflect" in data_spec:
+        low, high = bounds
+        bounds = [None if high is None else data_spec["reflect"] - high,
+                  None if low is None else data_spec["reflect"] - low]
+    if data_spec["dist"] == "mixture":
+        components = [{"truncate": bounds, **component} if bounds is not None else component
+                      for component in data_spec["components"]]
+        data = np.concatenate([sample(component, component["size"], rng) for component in components])
+    elif bounds is not None:
+        data = truncated.sample(data_spec["dist"], rng, data_spec.get("size", num_samples), *bounds,
+                                **data_spec.get("params", {}))
+    else:
+        data = SAMPLERS[data_spec["dist"]](rng, data_spec.get("size", num_samples), **data_spec.get("params", {}))
+    if "reflect" in data_spec:
+        data = data_spec["reflect"] - data
+    if "clip" in data_spec:
+        data = np.clip(data, *data_spec["clip"])
+    return data
+
+
+def streamed(data_spec):
+    return data_spec["dist"] in ("memmap", "csv") or "chunk" in data_spec
+
+
+def stream_sample(data_spec, bins, num_samples, rng):
+    """Samples or reads a panel chunk by chunk straight into its bins (see streaming.py).
+
+    Returns a StreamedTable; the full data never exists in memory. The bins span
+    "range" (default: "clip"), or the data's min-max range found in an extra pass.
+    """
+    if isinstance(bins, str):
+        raise ValueError(f"streamed panels need a bin count or edges, not {bins!r}")
+    chunk = int(data_spec.get("chunk", streaming.CHUNK))
+    if data_spec["dist"] == "memmap":
+        def source():
+            return streaming.memmap_chunks(data_spec["path"], data_spec.get("dtype", "float64"), chunk)
+    elif data_spec["dist"] == "csv":
+        def source():
+            return streaming.csv_chunks(data_spec["path"], data_spec.get("column", 0), chunk)
+    elif data_spec["dist"] == "mixture":
+        raise ValueError("mixtures cannot be streamed: their component sizes are fixed")
+    else:
+        n = int(data_spec.get("size", num_samples))
+        chunk_spec = {k: v for k, v in data_spec.items() if k not in ("chunk", "size", "range")}
+        source = streaming.replayable(rng, lambda chunk_rng: streaming.sampler_chunks(
+            lambda size: sample(chunk_spec, size, chunk_rng), n, chunk))
+    return streaming.accumulate(source, bins, data_spec.get("range", data_spec.get("clip"))).table()
+
+
+# --- Stage 2: bin ---
+def discrete_support(data_spec, data):
+    """The integer values a "discrete" panel has one bar for: randint's [low, high) or the data's range."""
+    if data_spec["dist"] == "randint":
+        return range(data_spec["params"]["low"], data_spec["params"]["high"])
+    described = describe(data)
+    return range(int(described.min), int(described.max) + 1)
+
+
+def discrete_edges(support):
+    """Unit bins centered on every value of the support."""
+    return np.arange(support.start, support.stop + 1) - 0.5
+
+
+def discrete_values(data, support):
+    """A discrete panel's data as integers; whole-valued floats are accepted, anything
+    else (fractions, NaN) or a value outside the support is a ValueError."""
+    data = np.asarray(data)
+    if not np.issubdtype(data.dtype, np.integer):
+        values = np.rint(data)
+        if not np.array_equal(values, data):
+            raise ValueError("discrete panel data must be whole numbers")
+        data = values.astype(np.int64)
+    if data.size and (data.min() < support.start or data.max() >= support.stop):
+        raise ValueError(f"discrete data outside its support {support}")
+    return data
+
+
+def bin_data(data, bins):
+    """bins is a bin count or edges as for np.histogram, or the range of a discrete panel."""
+    if isinstance(data, FrequencyTable):
+        return data.freqs, data.edges
+    if isinstance(bins, range):
+        # Integer data is counted exactly, one bar per value, with no float bin edges involved
+        return np.bincount(discrete_values(data, bins) - bins.start, minlength=len(bins)), discrete_edges(bins)
+    counts, edges = np.histogram(data, bins=bins)
+    return counts, edges
+
+
+def bin_many(datasets, bins):
+    """bin_data for many datasets: raw arrays of one length and binning share one counting pass."""
+    binned = [None] * len(datasets)
+    groups = {}
+    for i, (data, data_bins) in enumerate(zip(datasets, bins)):
+        if isinstance(data, FrequencyTable) or not isinstance(data_bins, (int, range)):
+            binned[i] = bin_data(data, data_bins)
+        else:
+            groups.setdefault((len(data), data_bins), []).append(i)
+    for (_, group_bins), members in groups.items():
+        stacked = np.stack([datasets[i] for i in members])
+        if isinstance(group_bins, range):
+            stacked = discrete_values(stacked, group_bins)
+            # Row r's values land in bincount slots r * n .. r * n + n - 1
+            n = len(group_bins)
+            offsets = np.arange(len(members))[:, None] * n - group_bins.start
+            counts = np.bincount((stacked + offsets).ravel(), minlength=len(members) * n).reshape(-1, n)
+            edges = np.broadcast_to(discrete_edges(group_bins), (len(members), n + 1))
+        else:
+            counts, edges = batch_histogram(stacked, group_bins)
+        for row, i in enumerate(members):
+            binned[i] = counts[row], np.array(edges[row])
+    return binned
+
+
+def summary(data):
+    """Returns (mean, std, min, max) of raw samples or of a frequency table, computed once per dataset."""
+    described = describe(data)
+    return described.mean, described.std, described.min, described.max
+
+
+# --- Stage 3: pdf ---
+def resolve_params(settings, data_spec, data):
+    """Returns the overlay's distribution parameters for one panel."""
+    dist = settings["dist"]
+    source = settings["params"]
+    if dist in ("flat", "ushape"):
+        return {}
+    if dist == "mixture" and source == "fit":
+        # Normal components estimated by EM; "components" sets how many
+        k = settings.get("components", 2)
+        if isinstance(data, FrequencyTable):
+            fitted = mixture_fit.fit_binned(data.freqs, data.edges, k)
+        else:
+            fitted = mixture_fit.fit(data, k)
+        params = {"components": [{"dist": "norm", "weight": weight, "loc": loc, "scale": scale}
+                                 for weight, loc, scale in fitted]}
+    elif dist == "kde":
+        # Binned Gaussian KDE on kde.py's grid. It is reflected at "bounds", by default
+        # the data's clip range, so the mass piled onto a bound stays inside it.
+        bounds = settings.get("bounds", data_spec.get("clip"))
+        if isinstance(data, FrequencyTable):
+            grid, values = kde.density(data.centers, settings.get("bandwidth", "scott"), bounds, data.freqs)
+        else:
+            grid, values = kde.density(data, settings.get("bandwidth", "scott"), bounds)
+        return kde_transform(settings, {"grid": grid, "density": values}, data)
+    elif dist == "mixture":
+        components = [dict(c) for c in data_spec["components"]] if source == "true" else source
+        total = sum(c.get("size", 1) for c in components)
+        params = {"components": [{"dist": c["dist"], "weight": c.get("weight", c.get("size", 1) / total),
+                                  **c.get("params", {})} for c in components]}
+    elif source == "fit":
+        if isinstance(data, FrequencyTable):
+            raise ValueError("fitted overlays need raw samples; use \"moments\" for frequency tables")
+        fitter = FITTERS.get(dist, DISTRIBUTIONS[dist].fit)
+        params = dict(zip(param_names(dist), fitter(data)))
+    elif source == "moments":
+        mean, std, _, _ = summary(data)
+        params = {"loc": mean, "scale": std}
+    elif source == "true":
+        params = dict(data_spec.get("params", {}))
+    else:
+        params = dict(source)
+    params.update(settings.get("set", {}))
+
+    # Distractor transforms, expressed in units of the data's standard deviation
+    targets = params["components"] if dist == "mixture" else [params]
+    for target in targets:
+        if "shift" in settings:
+            target["loc"] = target.get("loc", 0) + settings["shift"] * summary(data)[1]
+        if "scale_factor" in settings:
+            target["scale"] = target.get("scale", 1) * settings["scale_factor"]
+    return params
+
+
+def kde_transform(settings, params, data):
+    """Distractor transforms of a KDE overlay: the grid moves by shift and stretches
+    about the mean by scale_factor, with the density rescaled to keep its area."""
+    mean, std, _, _ = summary(data)
+    grid, values = params["grid"], params["density"]
+    if "scale_factor" in settings:
+        grid = mean + (grid - mean) * settings["scale_factor"]
+        values = values / settings["scale_factor"]
+    if "shift" in settings:
+        grid = grid + settings["shift"] * std
+    return {"grid": grid, "density": values}
+
+
+def x_range(settings, data):
+    spec = settings["x"]
+    mean, std, data_min, data_max = summary(data)
+    if spec == "data":
+        lo, hi = data_min, data_max
+    elif "sd" in spec:
+        lo, hi = mean - spec["sd"] * std, mean + spec["sd"] * std
+    elif "data_factor" in spec:
+        lo, hi = data_min * spec["data_factor"][0], data_max * spec["data_factor"][1]
+    else:
+        lo, hi = spec["range"]
+    return lo, hi
+
+
+def x_grid(settings, data):
+    return np.linspace(*x_range(settings, data), settings["points"])
+
+
+def mixture_pdf(x, components):
+    y = np.zeros_like(x)
+    for c in components:
+        params = {k: v for k, v in c.items() if k not in ("dist", "weight")}
+        y += c["weight"] * pdf(c["dist"], x, **params)
+    return y
+
+
+def mixture_cdf(x, components):
+    y = np.zeros_like(x)
+    for c in components:
+        params = {k: v for k, v in c.items() if k not in ("dist", "weight")}
+        y += c["weight"] * cdf(c["dist"], x, **params)
+    return y
+
+
+def evaluate_overlay(overlay, spec, base):
+    """Returns [(x, y), ...] for every panel, scaled to the histogram counts."""
+    datasets, counts, edges = base
+    n_panels = len(datasets)
+    settings = [overlay_settings(overlay, i) for i in range(n_panels)]
+    params = []
+    for i in range(n_panels):
+        with profiling.stage("fit" if settings[i]["params"] == "fit" else "params", panel=i):
+            params.append(resolve_params(settings[i], spec["panels"][i]["data"], datasets[i]))
+    with profiling.stage("pdf"):
+        return scaled_curves(settings, params, datasets, counts, edges,
+                             curve_sampling.axes_pixels(spec["figure"]))
+
+
+def _panel_pdf(settings, params):
+    """The unscaled density of one panel's overlay as a function of x."""
+    if settings["dist"] == "mixture":
+        return lambda x: mixture_pdf(x, params["components"])
+    if settings["dist"] == "kde":
+        return lambda x: np.interp(x, params["grid"], params["density"], left=0.0, right=0.0)
+    dist = settings["dist"]
+    columns = {name: params[name] for name in param_names(dist) if name in params}
+    return lambda x: pdf(dist, x, **columns)
+
+
+def _panel_cdf(settings, params):
+    if settings["dist"] == "mixture":
+        return lambda x: mixture_cdf(x, params["components"])
+    if settings["dist"] == "kde":
+        area = kde.cumulative(params["grid"], params["density"])
+        return lambda x: np.interp(x, params["grid"], area, left=0.0, right=1.0)
+    dist = settings["dist"]
+    columns = {name: params[name] for name in param_names(dist) if name in params}
+    return lambda x: cdf(dist, x, **columns)
+
+
+def expected_counts(settings, params, data, counts, edges, pixels):
+    """Bin-integrated overlay: N * (CDF(b[i+1]) - CDF(b[i])) over the histogram's own edges.
+
+    N is the size of the dataset, values outside the edges included, so the curve
+    shows what the model expects of the bars rather than rescaling it to the ones
+    drawn. style "step" traces the expected count of every bar; style "curve" is the
+    count expected in a window as wide as the bin under each x and centered on it,
+    which passes through those values at the bar centers for uneven bins too.
+    """
+    panel_cdf = _panel_cdf(settings, params)
+    total = describe(data).count
+    if settings["style"] == "step":
+        expected = total * np.diff(panel_cdf(edges))
+        return np.repeat(edges, 2)[1:-1], np.repeat(expected, 2)
+
+    widths = np.diff(edges)
+
+    def window_counts(x):
+        half = widths[np.clip(np.searchsorted(edges, x, side="right") - 1, 0, len(widths) - 1)] / 2
+        lower, upper = panel_cdf(np.stack([x - half, x + half]))
+        return total * (upper - lower)
+
+    if settings["sampling"] == "adaptive":
+        return curve_sampling.adaptive_grid(window_counts, *x_range(settings, data), settings["points"], pixels)
+    x = x_grid(settings, data)
+    return x, window_counts(x)
+
+
+def scaled_curves(settings, params, datasets, counts, edges, pixels):
+    n_panels = len(datasets)
+    xs = [None] * n_panels
+    ys = [None] * n_panels
+
+    # One broadcast pdf call per distribution over the stacked uniform panel grids;
+    # adaptive grids are refined panel by panel
+    groups = {}
+    for i, s in enumerate(settings):
+        if s["dist"] == "flat":
+            # A uniform answer is a flat line at the average bar height
+            xs[i] = edges[i][[0, -1]]
+            ys[i] = np.full(2, np.mean(counts[i]))
+        elif s["dist"] == "ushape":
+            # A U-shaped answer is a parabola over the bars, from 5% to 70% of the tallest
+            xs[i] = np.linspace(edges[i][0], edges[i][-1], s["points"])
+            u = (2 * xs[i] - edges[i][0] - edges[i][-1]) / (edges[i][-1] - edges[i][0])
+            ys[i] = counts[i].max() * (0.05 + 0.65 * u * u)
+        elif s["normalize"] == "expected":
+            xs[i], ys[i] = expected_counts(s, params[i], datasets[i], counts[i], edges[i], pixels)
+        elif s["sampling"] == "adaptive":
+            xs[i], ys[i] = curve_sampling.adaptive_grid(_panel_pdf(s, params[i]), *x_range(s, datasets[i]),
+                                                        s["points"], pixels)
+        elif s["dist"] == "mixture":
+            xs[i] = x_grid(s, datasets[i])
+            ys[i] = mixture_pdf(xs[i], params[i]["components"])
+        elif s["dist"] == "kde":
+            xs[i] = x_grid(s, datasets[i])
+            ys[i] = _panel_pdf(s, params[i])(xs[i])
+        else:
+            xs[i] = x_grid(s, datasets[i])
+            groups.setdefault((s["dist"], len(xs[i])), []).append(i)
+    for (dist, _), members in groups.items():
+        x = np.stack([xs[i] for i in members])
+        columns = {name: np.array([[params[i][name]] for i in members], dtype=float)
+                   for name in param_names(dist) if name in params[members[0]]}
+        y = pdf(dist, x, **columns)
+        for row, i in enumerate(members):
+            ys[i] = y[row]
+
+    curves = []
+    for i in range(n_panels):
+        if settings[i]["dist"] in ("flat", "ushape") or settings[i]["normalize"] == "expected":
+            y = ys[i]
+        elif settings[i]["normalize"] == "peak":
+            y = ys[i] * (counts[i].max() / ys[i].max())
+        else:
+            y = ys[i] * len(datasets[i]) * (edges[i][1] - edges[i][0])
+        curves.append((xs[i], y))
+    return curves
+
+
+def sample_students(spec, students):
+    """Samples every panel of a parsed spec for each student and bins all of them together.
+
+    Returns one (datasets, counts, edges) per student.
+    """
+    panels = [panel_settings(spec, i) for i in range(len(spec["panels"]))]
+    datasets = []
+    for student in students:
+        rngs = seeding.panel_rngs(spec.get("seed", 0), spec["id"], len(panels), student,
+                                  spec.get("seed_mode", seeding.STREAMS))
+        student_data = []
+        for i, panel in enumerate(panels):
+            with profiling.stage("sample", panel=i):
+                if streamed(panel["data"]):
+                    student_data.append(stream_sample(panel["data"], panel["bins"], panel["num_samples"], rngs[i]))
+                else:
+                    student_data.append(sample(panel["data"], panel["num_samples"], rngs[i]))
+        datasets.append(student_data)
+
+    with profiling.stage("bin"):
+        bins = [discrete_support(panel["data"], data) if panel["bins"] == "discrete" else panel["bins"]
+                for student_data in datasets for panel, data in zip(panels, student_data)]
+        binned = bin_many([data for student_data in datasets for data in student_data], bins)
+    bases = []
+    for k, student_data in enumerate(datasets):
+        student_bins = binned[k * len(panels):(k + 1) * len(panels)]
+        bases.append((student_data, [c for c, _ in student_bins], [e for _, e in student_bins]))
+    return bases
+
+
+def sample_panels(spec, student=None):
+    """Samples and bins every panel of a parsed spec; returns (datasets, counts, edges)."""
+    return sample_students(spec, [student])[0]
+
+
+# --- Stage 4: draw ---
+def build_base(spec_text, student=None):
+    """Samples and bins every panel of a spec and draws the shared bars and labels.
+
+    student selects an independent set of random streams for personalized data.
+    """
+    spec = json.loads(spec_text)
+    figure = spec["figure"]
+    datasets, counts, edges = sample_panels(spec, student)
+    fig, axes = plt.subplots(figure.get("nrows", 2), figure.get("ncols", 2), figsize=figure.get("figsize", [12, 10]))
+    fig.suptitle(figure["suptitle"], fontsize=figure.get("suptitle_fontsize", 16))
+
+    for i, ax in enumerate(axes.flat):
+        panel = panel_settings(spec, i)
+        with profiling.stage("draw", panel=i):
+            # Weighted hist of the left edges draws exactly the bars ax.hist(data) would
+            ax.hist(edges[i][:-1], bins=edges[i], weights=counts[i], alpha=panel["alpha"],
+                    color=panel["color"], edgecolor=panel["edgecolor"], rwidth=panel.get("rwidth"))
+            ax.set_title(panel["title"])
+            ax.set_xlabel(panel["xlabel"])
+            ax.set_ylabel(panel["ylabel"])
+            if "xlim" in panel:
+                ax.set_xlim(panel["xlim"])
+            if "xticks" in panel:
+                ax.set_xticks(panel["xticks"])
+    return fig, (datasets, counts, edges)
+
+
+def variant_drawer(variant, spec):
+    overlay = variant.get("overlay")
+    suptitle = variant.get("suptitle", spec["figure"]["suptitle"])
+
+    def draw(axes, base):
+        axes.flat[0].figure.suptitle(suptitle, fontsize=spec["figure"].get("suptitle_fontsize", 16))
+        if not overlay:
+            return
+        curves = evaluate_overlay(overlay, spec, base)
+        for i, (ax, (x, y)) in enumerate(zip(axes.flat, curves)):
+            settings = overlay_settings(overlay, i)
+            ax.plot(x, y, color=settings["color"], linewidth=settings["linewidth"])
+    return draw
+
+
+def output_name(filename, student):
+    if student is None:
+        return filename
+    stem, ext = os.path.splitext(filename)
+    return f"{stem}_student{student}{ext}"
+
+
+def render_spec(path, out_dir=".", student=None):
+    """Renders every variant of a spec file and returns the paths written."""
+    with open(path) as f:
+        spec = json.load(f)
+    return render(spec, out_dir, student)
+
+
+def render(spec, out_dir=".", student=None, cache_dir=DEFAULT_CACHE_DIR):
+    """Renders every variant of a parsed spec; cache_dir=None rebuilds the base layer."""
+    with profiling.context(pt=spec["id"]):
+        spec_text = json.dumps(spec, sort_keys=True)
+        fig, base = load_base(build_base, spec_text, student, cache_dir=cache_dir)
+
+        variants = [(os.path.join(out_dir, output_name(variant["output"], student)), variant_drawer(variant, spec))
+                    for variant in spec["variants"]]
+
+        rect = spec["figure"].get("tight_layout_rect")
+        written = render_variants(fig, base, variants, layout=lambda fig: fig.tight_layout(rect=rect),
+                                  dpi=spec["figure"].get("dpi", 300), bbox_inches='tight')
+        plt.close(fig)
+        return written
+
+
+# --- Check ---
+def check(rng):
+    """Checks the helpers whose edge cases the specs do not reach; returns the failure count."""
+    failures = 0
+    # Expected counts over uneven bins, with part of the data outside them
+    data = rng.normal(0, 1, 1000)
+    edges = np.array([-3, -1, -0.5, 0, 0.25, 1, 2])
+    counts = np.histogram(data, edges)[0]
+    params = {"loc": 0, "scale": 1}
+    expected = len(data) * np.diff(stats.norm.cdf(edges))
+    overlay = {"dist": "norm", "normalize": "expected", "x": {"range": [-3, 2]}, "points": 41}
+    _, step = expected_counts(overlay_settings({**overlay, "style": "step"}, 0), params, data, counts, edges, None)
+    x, curve = expected_counts(overlay_settings(overlay, 0), params, data, counts, edges, None)
+    centers = np.searchsorted(x, (edges[:-1] + edges[1:]) / 2)
+    ok = np.allclose(step[::2], expected) and np.allclose(curve[centers], expected)
+    failures += not ok
+    print(f"{'ok' if ok else 'FAIL':<4}  expected counts over uneven bins, {len(data) - counts.sum()} values outside: "
+          f"steps and curve at the bar centers match N * CDF differences: {ok}")
+
+    # Discrete panels: whole-valued floats count like integers, fractions are refused
+    values = rng.integers(2, 9, 500)
+    support = range(2, 9)
+    reference = np.bincount(values - 2, minlength=7)
+    counted = [bin_data(values.astype(float), support)[0]]
+    counted += [c for c, _ in bin_many([values.astype(float)] * 2, [support] * 2)]
+    ok = all(np.array_equal(c, reference) for c in counted)
+    try:
+        bin_many([values + 0.5] * 2, [support] * 2)
+        refused = False
+    except ValueError:
+        refused = True
+    failures += not (ok and refused)
+    print(f"{'ok' if ok and refused else 'FAIL':<4}  discrete float data: whole values counted exactly: {ok}, "
+          f"fractions raise ValueError: {refused}")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render every answer variant of PT spec files.")
+    parser.add_argument("specs", nargs="*", help="PT spec JSON files")
+    parser.add_argument("--out-dir", default=".", help="Directory for the rendered images")
+    parser.add_argument("--students", type=int, default=0,
+                        help="Render this many personalized copies, each from its own random streams")
+    parser.add_argument("--profile", metavar="TRACE_JSON",
+                        help="Time every pipeline stage, print per-PT totals and write a Chrome trace")
+    parser.add_argument("--check", action="store_true", help="Check the binning and overlay helpers, then exit")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        return 1 if check(np.random.default_rng(0)) else 0
+    if not args.specs:
+        parser.error("no spec files given")
+    if args.profile:
+        profiling.enable()
+    matplotlib.use("Agg")
+    os.makedirs(args.out_dir, exist_ok=True)
+    students = range(args.students) if args.students else [None]
+    for path in args.specs:
+        for student in students:
+            for written in render_spec(path, args.out_dir, student):
+                print(written)
+    if args.profile:
+        profiling.print_summary()
+        profiling.write_chrome_trace(args.profile)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
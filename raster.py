@@ -0,0 +1,766 @@
+import argparse
+import functools
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+
+import numpy as np
+import matplotlib
+from matplotlib import ticker
+from matplotlib.backends.backend_agg import get_hinting_flag
+from matplotlib.colors import to_rgb
+from matplotlib.font_manager import FontProperties, findfont, get_font
+
+import profiling
+from pt_spec import evaluate_overlay, output_name, overlay_settings, panel_settings, sample_panels
+
+# Lightweight renderer for bar-plus-curve panels.
+#
+# A PT panel is a handful of filled rectangles with a black edge, one anti-aliased
+# polyline and a few strings. Going through matplotlib's artist tree, layout engine
+# and Agg renderer for each of them dominates the cost of mass-personalized images
+# (one set per student). This module rasterizes the panels straight into a NumPy
+# RGB buffer and encodes the PNG itself:
+#
+#   bars   - rectangles snapped to the pixel grid like Agg does, alpha-composited
+#   curve  - per-segment distance field, so the line is anti-aliased and round-joined
+#   text   - every string is rendered once by FreeType (the font matplotlib uses) and
+#            the grey bitmap is cached and composited; tick labels repeat across
+#            students, so most text is a cache hit
+#
+# The figure is laid out like production: the subplot geometry that
+# fig.tight_layout(rect=...) picks from the tick labels and titles (worked out on
+# the panel layout at the figure's 100 dpi, as matplotlib does before savefig),
+# the same tick locator, formatter (offset text included) and rc sizes, and white
+# margins trimmed like bbox_inches="tight". check_against_matplotlib() renders the
+# same variants with matplotlib under those settings and compares the whole figure
+# and, separately, the inside of the axes, where a missing or misplaced curve or bar
+# shows up.
+
+# matplotlib defaults (rcParams) for the elements drawn here, in points
+SUBPLOT_PARAMS = {"left": 0.125, "right": 0.9, "bottom": 0.11, "top": 0.88, "wspace": 0.2, "hspace": 0.2}
+FONT_SIZE = 10.0
+TITLE_SIZE = 12.0
+TITLE_PAD = 6.0
+LABEL_PAD = 4.0
+OFFSET_PAD = 3.0  # Axis.OFFSETTEXTPAD
+TICK_LENGTH = 3.5
+TICK_PAD = 3.5
+TICK_WIDTH = 0.8
+SPINE_WIDTH = 0.8
+EDGE_WIDTH = 1.0
+MARGIN = 0.05
+SUPTITLE_Y = 0.98
+TIGHT_PAD = 0.1  # savefig.pad_inches
+TIGHT_LAYOUT_PAD = 1.08  # tight_layout's pad, in font sizes
+TIGHT_LAYOUT_DPI = 100  # figure.dpi, at which production runs tight_layout
+TICK_STEPS = [1, 2, 2.5, 5, 10]
+SEGMENT_PIXELS = 8  # Longest curve piece rasterized in one window
+PNG_LEVEL = 3  # zlib level: with the Up filter, higher levels cost twice the time for ~25% smaller files
+
+# Pixel-diff tolerance against matplotlib: mean absolute difference per channel
+# (0-1 scale) and the fraction of pixels that differ by more than MISMATCH_LEVEL.
+# The whole-figure limits cover text, which matplotlib places glyph by glyph at
+# sub-pixel offsets; the plot-area limits (axes insides, AXES_INSET pixels in from
+# the spines) hold the bars and curves, which match almost exactly, and are the
+# ones a missing or misplaced curve breaks.
+MAX_MEAN_DIFF = 0.009
+MAX_MISMATCH = 0.014
+MAX_PLOT_MEAN_DIFF = 0.004
+MAX_PLOT_MISMATCH = 0.003
+MISMATCH_LEVEL = 0.25
+AXES_INSET = 2
+
+_text_cache = {}
+
+
+# --- Text ---
+class TextBitmap:
+    """A string rendered once by FreeType, with the metrics matplotlib lays it out by.
+
+    alpha is the grey coverage bitmap; its pen origin sits `offset` pixels left of
+    column 0 and the baseline lies `baseline` rows below its top. width, ascent and
+    descent describe the layout box (at least the font's line height, like matplotlib's).
+    """
+
+    def __init__(self, text, size, dpi):
+        font = get_font(findfont(FontProperties(size=size)))
+        font.clear()
+        font.set_size(size, dpi)
+        min_ascent, min_descent = line_extents(font, size, dpi)
+
+        font.set_text(text, 0.0, flags=get_hinting_flag())
+        font.draw_glyphs_to_bitmap(antialiased=True)
+        width, height = (v / 64 for v in font.get_width_height())
+        descent = font.get_descent() / 64
+        self.alpha = np.asarray(font.get_image(), dtype=np.float32) / 255
+        self.offset = font.get_bitmap_offset()[0] / 64
+        self.baseline = 1 + height - descent  # The bitmap has one row of padding on top
+        self.width = width
+        self.ascent = max(height - descent, min_ascent)
+        self.descent = max(descent, min_descent)
+
+
+def line_extents(font, size, dpi):
+    """Smallest ascent and descent (pixels) of a line of text, as matplotlib's Text takes
+    them: the font's typographic ascender and descender (OS/2, else hhea table), or
+    the measured extents of "lp" for a font without those tables."""
+    scale = size * dpi / 72 / font.get_sfnt_table("head")["unitsPerEm"]
+    for table, ascent, descent in [("OS/2", "sTypoAscender", "sTypoDescender"), ("hhea", "ascent", "descent")]:
+        values = font.get_sfnt_table(table)
+        if values is not None:
+            return values[ascent] * scale, -values[descent] * scale
+    font.set_text("lp", 0.0, flags=get_hinting_flag())
+    height, descent = font.get_width_height()[1] / 64, font.get_descent() / 64
+    return height - descent, descent
+
+
+def text_bitmap(text, size, dpi):
+    """Returns the cached TextBitmap of a string at a font size and dpi."""
+    key = (text, size, dpi)
+    if key not in _text_cache:
+        _text_cache[key] = TextBitmap(text, size, dpi)
+    return _text_cache[key]
+
+
+def place_text(text, x, y, size, dpi, ha="center", va="baseline"):
+    """Lays out a string anchored at (x, y) with matplotlib's ha/va meaning (y down).
+
+    Returns the pen position on the baseline and the layout box (left, top, right, bottom).
+    """
+    t = text_bitmap(text, size, dpi)
+    height = t.ascent + t.descent
+    pen = x - {"left": 0, "center": t.width / 2, "right": t.width}[ha]
+    baseline = y + {"top": t.ascent, "bottom": -t.descent, "baseline": 0,
+                    "center": t.ascent - height / 2, "center_baseline": t.ascent / 2}[va]
+    return pen, baseline, (pen, baseline - t.ascent, pen + t.width, baseline + t.descent)
+
+
+def text_box(text, x, y, size, dpi, ha="center", va="baseline", rotation=0):
+    """Layout box (left, top, right, bottom) of a string as Canvas.text draws it."""
+    if rotation == 90:
+        t = text_bitmap(text, size, dpi)
+        return x - t.ascent - t.descent, y - t.width / 2, x, y + t.width / 2
+    return place_text(text, x, y, size, dpi, ha, va)[2]
+
+
+# --- Canvas ---
+@functools.lru_cache(maxsize=256)
+def _blend_tables(color, alpha):
+    """uint8 -> uint8 tables that composite color at alpha over each channel value."""
+    values = np.arange(256, dtype=np.float32)
+    return [(values + alpha * (c * 255 - values) + 0.5).astype(np.uint8) for c in color]
+
+
+def snap(v, width):
+    """Snaps a coordinate like Agg's PathSnapper: to pixel centers for lines of odd
+    (rounded) pixel width, to pixel boundaries otherwise, so straight lines stay crisp."""
+    return np.floor(v + 0.5) + (0.5 if int(round(width)) % 2 else 0.0)
+
+
+class Canvas:
+    """An RGB uint8 buffer with the few drawing primitives a PT panel needs.
+
+    Coordinates are pixels from the top-left corner, like the image rows.
+    """
+
+    def __init__(self, width, height, dpi):
+        self.dpi = dpi
+        self.pixels = np.full((height, width, 3), 255, dtype=np.uint8)
+
+    def points(self, pt):
+        return pt * self.dpi / 72
+
+    def blend(self, rows, cols, coverage, color, alpha=1.0):
+        """Composites color over the region [rows, cols] with per-pixel coverage."""
+        a = (coverage * alpha)[..., None]
+        region = self.pixels[rows, cols].astype(np.float32)
+        region += a * (np.asarray(color, dtype=np.float32) * 255 - region)
+        self.pixels[rows, cols] = region + 0.5
+
+    def fill_rect(self, x0, y0, x1, y1, color, alpha=1.0):
+        """Fills a rectangle, anti-aliasing partially covered edge pixels."""
+        h, w, _ = self.pixels.shape
+        # Fully covered interior: a per-channel lookup table instead of float blending
+        c0, c1 = max(int(np.ceil(x0)), 0), min(int(np.floor(x1)), w)
+        r0, r1 = max(int(np.ceil(y0)), 0), min(int(np.floor(y1)), h)
+        if c1 > c0 and r1 > r0:
+            region = self.pixels[r0:r1, c0:c1]
+            for channel, table in enumerate(_blend_tables(tuple(color), alpha)):
+                region[..., channel] = table[region[..., channel]]
+        else:
+            c0 = c1 = r0 = r1 = None
+        # Partially covered rim, at most one pixel wide on each side
+        for strip in [(x0, y0, x1, r0 if r0 is not None else y1), (x0, r1 if r1 is not None else y1, x1, y1)]:
+            self._blend_coverage(*strip, color, alpha)
+        if r0 is not None:
+            self._blend_coverage(x0, r0, c0, r1, color, alpha)
+            self._blend_coverage(c1, r0, x1, r1, color, alpha)
+
+    def _blend_coverage(self, x0, y0, x1, y1, color, alpha):
+        coverage = self._rect_coverage(x0, y0, x1, y1)
+        if coverage is not None:
+            (rows, cols), cov = coverage
+            self.blend(rows, cols, cov, color, alpha)
+
+    def stroke_rect(self, x0, y0, x1, y1, width, color, alpha=1.0):
+        """Draws the outline of a rectangle with a line of the given pixel width."""
+        half = width / 2
+        # Four non-overlapping strips: top and bottom span the corners, the sides fit between
+        strips = [(x0 - half, y0 - half, x1 + half, y0 + half), (x0 - half, y1 - half, x1 + half, y1 + half)]
+        if y1 - y0 > width:
+            strips += [(x0 - half, y0 + half, x0 + half, y1 - half), (x1 - half, y0 + half, x1 + half, y1 - half)]
+        for strip in strips:
+            self._blend_coverage(*strip, color, alpha)
+
+    def _rect_coverage(self, x0, y0, x1, y1):
+        """Returns ((rows, cols), coverage) of the pixels touched by a rectangle."""
+        h, w, _ = self.pixels.shape
+        c0, c1 = max(int(np.floor(x0)), 0), min(int(np.ceil(x1)), w)
+        r0, r1 = max(int(np.floor(y0)), 0), min(int(np.ceil(y1)), h)
+        if c1 <= c0 or r1 <= r0:
+            return None
+        left = np.arange(c0, c1, dtype=np.float32)
+        top = np.arange(r0, r1, dtype=np.float32)
+        across = np.clip(np.minimum(left + 1, x1) - np.maximum(left, x0), 0, 1)
+        down = np.clip(np.minimum(top + 1, y1) - np.maximum(top, y0), 0, 1)
+        return (slice(r0, r1), slice(c0, c1)), down[:, None] * across[None, :]
+
+    def hline(self, x0, x1, y, width, color):
+        y = snap(y, width)
+        self.fill_rect(x0, y - width / 2, x1, y + width / 2, color)
+
+    def vline(self, x, y0, y1, width, color):
+        x = snap(x, width)
+        self.fill_rect(x - width / 2, y0, x + width / 2, y1, color)
+
+    def polyline(self, xs, ys, width, color, clip):
+        """Draws an anti-aliased polyline of the given pixel width inside clip=(x0, y0, x1, y1).
+
+        Every segment is split into pieces of at most SEGMENT_PIXELS, so that all pieces
+        fit the same square window; the distance fields of all windows are computed in
+        one vectorized pass and only the pixels they touch are blended.
+        """
+        cx0, cy0 = max(int(round(clip[0])), 0), max(int(round(clip[1])), 0)
+        cx1, cy1 = min(int(round(clip[2])), self.pixels.shape[1]), min(int(round(clip[3])), self.pixels.shape[0])
+        if cx1 <= cx0 or cy1 <= cy0:
+            return
+        pts = np.column_stack([xs, ys]).astype(float)
+        # Drop points that do not move the pen by at least a pixel
+        keep = np.concatenate([[True], np.any(np.abs(np.diff(np.round(pts), axis=0)) > 0, axis=1)])
+        keep[-1] = True
+        pts = pts[keep]
+        starts, ends = pts[:-1], pts[1:]
+        pieces = np.maximum(np.ceil(np.abs(ends - starts).max(axis=1) / SEGMENT_PIXELS), 1).astype(int)
+        index = np.repeat(np.arange(len(starts)), pieces)
+        step = (np.arange(len(index)) - np.repeat(np.cumsum(pieces) - pieces, pieces))
+        a = starts[index] + (ends - starts)[index] * (step / pieces[index])[:, None]
+        b = starts[index] + (ends - starts)[index] * ((step + 1) / pieces[index])[:, None]
+
+        half = width / 2
+        size = int(np.ceil(SEGMENT_PIXELS + width + 2))
+        origin = np.floor(np.minimum(a, b) - half - 1).astype(int)
+        offsets = np.arange(size)
+        px = (origin[:, 0, None] + offsets)[:, None, :] + 0.5
+        py = (origin[:, 1, None] + offsets)[:, :, None] + 0.5
+        d = (b - a)[:, None, None, :]
+        length2 = np.maximum((d ** 2).sum(axis=-1), 1e-12)
+        t = np.clip(((px - a[:, 0, None, None]) * d[..., 0] + (py - a[:, 1, None, None]) * d[..., 1]) / length2, 0, 1)
+        dist = np.hypot(px - (a[:, 0, None, None] + t * d[..., 0]), py - (a[:, 1, None, None] + t * d[..., 1]))
+        cov = np.clip(half + 0.5 - dist, 0, 1).astype(np.float32)
+
+        cols = np.broadcast_to((origin[:, 0, None] + offsets)[:, None, :], cov.shape)
+        rows = np.broadcast_to((origin[:, 1, None] + offsets)[:, :, None], cov.shape)
+        inside = (cov > 0) & (cols >= cx0) & (cols < cx1) & (rows >= cy0) & (rows < cy1)
+        # Pixels covered by several windows keep their largest coverage
+        flat = rows[inside] * self.pixels.shape[1] + cols[inside]
+        order = np.argsort(flat, kind="stable")
+        flat, cov = flat[order], cov[inside][order]
+        if flat.size:
+            first = np.concatenate([[0], np.flatnonzero(np.diff(flat)) + 1])
+            self.blend_pixels(flat[first], np.maximum.reduceat(cov, first), color)
+
+    def blend_pixels(self, flat_index, coverage, color, alpha=1.0):
+        """Composites color over scattered pixels given by their flat (row * width + col) index."""
+        pixels = self.pixels.reshape(-1, 3)
+        a = (coverage * alpha)[:, None]
+        values = pixels[flat_index].astype(np.float32)
+        values += a * (np.asarray(color, dtype=np.float32) * 255 - values)
+        pixels[flat_index] = values + 0.5
+
+    def text(self, text, x, y, size, ha="center", va="baseline", rotation=0):
+        """Composites black text anchored at (x, y) with matplotlib's ha/va meaning and
+        returns its layout box (left, top, right, bottom).
+
+        rotation=90 is only used for y labels, which matplotlib anchors at the middle
+        of the text's bottom side (its right side once rotated).
+        """
+        t = text_bitmap(text, size, self.dpi)
+        if rotation == 90:
+            baseline = x - t.descent
+            pen = y + t.width / 2
+            alpha = np.rot90(t.alpha)
+            self._paste(alpha, int(round(baseline - t.baseline)), int(round(pen - t.offset - alpha.shape[0])))
+            return text_box(text, x, y, size, self.dpi, rotation=90)
+        pen, baseline, box = place_text(text, x, y, size, self.dpi, ha, va)
+        self._paste(t.alpha, int(round(pen + t.offset)), int(round(baseline - t.baseline)))
+        return box
+
+    def _paste(self, alpha, left, top):
+        h, w, _ = self.pixels.shape
+        r0, c0 = max(top, 0), max(left, 0)
+        r1, c1 = min(top + alpha.shape[0], h), min(left + alpha.shape[1], w)
+        if r1 > r0 and c1 > c0:
+            self.blend(slice(r0, r1), slice(c0, c1), alpha[r0 - top:r1 - top, c0 - left:c1 - left], (0, 0, 0))
+
+
+# --- PNG ---
+def _chunk(kind, data):
+    body = kind + data
+    return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body) & 0xFFFFFFFF)
+
+
+def encode_png(rgb, dpi=None, level=PNG_LEVEL):
+    """Encodes an (h, w, 3) uint8 array as an 8-bit RGB PNG."""
+    h, w, _ = rgb.shape
+    flat = rgb.reshape(h, w * 3)
+    # Filter type 2 (Up) on every row: rows inside flat fills and white space become zeros
+    raw = np.empty((h, 1 + w * 3), dtype=np.uint8)
+    raw[:, 0] = 2
+    raw[0, 1:] = flat[0]
+    np.subtract(flat[1:], flat[:-1], out=raw[1:, 1:])
+    png = b"\x89PNG\r\n\x1a\n" + _chunk(b"IHDR", struct.pack(">IIBBBBB", w, h, 8, 2, 0, 0, 0))
+    if dpi:
+        ppm = int(round(dpi / 0.0254))
+        png += _chunk(b"pHYs", struct.pack(">IIB", ppm, ppm, 1))
+    return png + _chunk(b"IDAT", zlib.compress(raw, level)) + _chunk(b"IEND", b"")
+
+
+def trim(rgb, pad):
+    """Crops white margins down to pad pixels, like savefig(bbox_inches="tight")."""
+    ink = rgb.reshape(rgb.shape[0], -1) != 255
+    rows = np.flatnonzero(ink.any(axis=1))
+    cols = np.flatnonzero(ink.any(axis=0).reshape(-1, 3).any(axis=1))
+    if rows.size == 0:
+        return rgb
+    r0, r1 = max(rows[0] - pad, 0), min(rows[-1] + 1 + pad, rgb.shape[0])
+    c0, c1 = max(cols[0] - pad, 0), min(cols[-1] + 1 + pad, rgb.shape[1])
+    return np.ascontiguousarray(rgb[r0:r1, c0:c1])
+
+
+# --- Layout ---
+def axes_rects(nrows, ncols, width, height, params=SUBPLOT_PARAMS):
+    """Pixel rectangles (x0, y0, x1, y1) of a subplot grid, top-left origin, row-major."""
+    p = params
+    cell_w = (p["right"] - p["left"]) / (ncols + p["wspace"] * (ncols - 1))
+    cell_h = (p["top"] - p["bottom"]) / (nrows + p["hspace"] * (nrows - 1))
+    rects = []
+    for row in range(nrows):
+        top = p["top"] - row * cell_h * (1 + p["hspace"])
+        for col in range(ncols):
+            left = p["left"] + col * cell_w * (1 + p["wspace"])
+            rects.append((left * width, (1 - top) * height, (left + cell_w) * width, (1 - top + cell_h) * height))
+    return rects
+
+
+def tick_values(vmin, vmax, length_px, dpi, factor):
+    """Tick locations as matplotlib's AutoLocator picks them for an axis of this length."""
+    space = int(np.floor(length_px * 72 / dpi / (FONT_SIZE * factor)))
+    locator = ticker.MaxNLocator(nbins=max(min(space, 9), 1), steps=TICK_STEPS)
+    ticks = locator.tick_values(vmin, vmax)
+    eps = (vmax - vmin) * 1e-10
+    return ticks[(ticks >= vmin - eps) & (ticks <= vmax + eps)]
+
+
+def tick_labels(ticks, vmin, vmax):
+    """Formats ticks on an axis from vmin to vmax with ScalarFormatter; returns the
+    labels and the offset text ("1e6", "+1.5e3", or "" when there is none)."""
+    formatter = ticker.ScalarFormatter()
+    formatter.create_dummy_axis()
+    formatter.axis.set_view_interval(vmin, vmax)
+    return formatter.format_ticks(ticks), formatter.get_offset()
+
+
+# --- Panels ---
+def layout_panel(rect, panel, counts, edges, curve, dpi):
+    """Places one panel inside rect (pixels at dpi, y down) the way matplotlib would.
+
+    Returns the axis limits, the bar corners, the curve in pixels, the tick positions
+    and every string as (text, x, y, size, ha, va, rotation).
+    """
+    x0, y0, x1, y1 = rect
+    left = edges[:-1]
+    right = edges[1:]
+    if panel.get("rwidth") is not None:
+        width = (right - left) * panel["rwidth"]
+        left = left + (right - left - width) / 2
+        right = left + width
+
+    # Limits: bars and curve plus 5% margins, except the bottom which sticks to 0
+    lo, hi = left[0], right[-1]
+    top = float(np.max(counts))
+    if curve is not None:
+        lo, hi = min(lo, np.min(curve[0])), max(hi, np.max(curve[0]))
+        top = max(top, float(np.max(curve[1])))
+    xlim = panel.get("xlim") or (lo - MARGIN * (hi - lo), hi + MARGIN * (hi - lo))
+    ylim = (0.0, top * (1 + MARGIN))
+
+    def to_px(x, y):
+        px = x0 + (np.asarray(x, dtype=float) - xlim[0]) / (xlim[1] - xlim[0]) * (x1 - x0)
+        py = y1 - (np.asarray(y, dtype=float) - ylim[0]) / (ylim[1] - ylim[0]) * (y1 - y0)
+        return px, py
+
+    bx0, by0 = to_px(left, counts)
+    bx1, by1 = to_px(right, np.zeros_like(counts))
+    tick_len = TICK_LENGTH * dpi / 72
+    pad = TICK_PAD * dpi / 72
+    texts = []
+
+    xticks = np.asarray(panel["xticks"], dtype=float) if "xticks" in panel else \
+        tick_values(*xlim, x1 - x0, dpi, 3)
+    xticks = xticks[(xticks >= min(xlim)) & (xticks <= max(xlim))]
+    xtick_px = to_px(xticks, 0)[0]
+    xlabels, xoffset = tick_labels(xticks, *xlim)
+    label_bottom = y1
+    for tx, label in zip(xtick_px, xlabels):
+        texts.append((label, tx, y1 + tick_len + pad, FONT_SIZE, "center", "top", 0))
+        label_bottom = max(label_bottom, place_text(*texts[-1][:4], dpi, "center", "top")[2][3])
+
+    yticks = tick_values(*ylim, y1 - y0, dpi, 2)
+    ytick_px = to_px(0, yticks)[1]
+    ylabels, yoffset = tick_labels(yticks, *ylim)
+    label_left = x0
+    for ty, label in zip(ytick_px, ylabels):
+        texts.append((label, x0 - tick_len - pad, ty, FONT_SIZE, "right", "center_baseline", 0))
+        label_left = min(label_left, place_text(*texts[-1][:4], dpi, "right", "center_baseline")[2][0])
+
+    # Offset texts: the x one right-aligned under the tick labels, the y one above the
+    # top-left corner, where matplotlib lifts the title clear of it if they overlap
+    offset_pad = OFFSET_PAD * dpi / 72
+    title_y = y0 - TITLE_PAD * dpi / 72
+    if xoffset:
+        texts.append((xoffset, x1, label_bottom + offset_pad, FONT_SIZE, "right", "top", 0))
+    if yoffset:
+        texts.append((yoffset, x0, y0 - offset_pad, FONT_SIZE, "left", "baseline", 0))
+        ol, ot, o_r, ob = text_box(*texts[-1][:4], dpi, "left", "baseline")
+        tl, tt, tr, tb = text_box(panel["title"], (x0 + x1) / 2, title_y, TITLE_SIZE, dpi, "center", "baseline")
+        if tl <= o_r and ol <= tr and tt <= ob and ot <= tb:
+            title_y = ot - TITLE_PAD * dpi / 72
+
+    texts.append((panel["title"], (x0 + x1) / 2, title_y, TITLE_SIZE, "center", "baseline", 0))
+    texts.append((panel["xlabel"], (x0 + x1) / 2, label_bottom + LABEL_PAD * dpi / 72, FONT_SIZE, "center", "top", 0))
+    texts.append((panel["ylabel"], label_left - LABEL_PAD * dpi / 72, (y0 + y1) / 2, FONT_SIZE, "center", "bottom", 90))
+    return {
+        "rect": rect,
+        "xlim": xlim,
+        "ylim": ylim,
+        "bars": (bx0, by0, bx1, by1),
+        "curve": to_px(*curve) if curve is not None else None,
+        "xticks": xtick_px,
+        "yticks": ytick_px,
+        "texts": texts,
+    }
+
+
+def layout_bbox(layout, dpi):
+    """The box (left, top, right, bottom) tight_layout keeps clear around a panel: the
+    axes, tick marks, tick labels and offset texts, with the title and x label (the last
+    texts but one and two) counted for their height only and the y label for its width
+    only."""
+    x0, y0, x1, y1 = layout["rect"]
+    tick_len = TICK_LENGTH * dpi / 72
+    boxes = [(x0 - tick_len, y0, x1, y1 + tick_len)]
+    boxes += [text_box(*text[:4], dpi, *text[4:]) for text in layout["texts"]]
+    for i in (-3, -2):
+        left, top, right, bottom = boxes[i]
+        boxes[i] = ((left + right) / 2 - 0.5, top, (left + right) / 2 + 0.5, bottom)
+    left, top, right, bottom = boxes[-1]
+    boxes[-1] = (left, (top + bottom) / 2 - 0.5, right, (top + bottom) / 2 + 0.5)
+    boxes = np.array(boxes)
+    return boxes[:, 0].min(), boxes[:, 1].min(), boxes[:, 2].max(), boxes[:, 3].max()
+
+
+def tight_params(layouts, nrows, ncols, width, height, dpi, suptitle=None, rect=None):
+    """Subplot parameters fig.tight_layout(rect=rect) picks for panels laid out at dpi.
+
+    Follows matplotlib's get_tight_layout_figure: the margins are the largest overhang
+    of the panel boxes past their axes plus a pad, the top one also making room for
+    the suptitle, and with a rect the same is solved again inside it. Falls back to
+    SUBPLOT_PARAMS where matplotlib would warn and leave the layout alone.
+    """
+    pad = TIGHT_LAYOUT_PAD * FONT_SIZE * dpi / 72
+    hspaces = np.zeros((nrows, ncols + 1))
+    vspaces = np.zeros((nrows + 1, ncols))
+    for k, layout in enumerate(layouts):
+        row, col = divmod(k, ncols)
+        x0, y0, x1, y1 = layout["rect"]
+        left, top, right, bottom = layout_bbox(layout, dpi)
+        hspaces[row, col] += (x0 - left) / width
+        hspaces[row, col + 1] += (right - x1) / width
+        vspaces[row, col] += (y0 - top) / height
+        vspaces[row + 1, col] += (bottom - y1) / height
+
+    def adjust(rect):
+        # matplotlib's _auto_adjust_subplotpars; rect's zero sides count as not given
+        if rect is None:
+            left = bottom = right = top = None
+        else:
+            left, bottom = rect[0], rect[1]
+            right = 1 - rect[2] if rect[2] else None
+            top = 1 - rect[3] if rect[3] else None
+        if not left:
+            left = max(hspaces[:, 0].max(), 0) + pad / width
+        if not right:
+            right = max(hspaces[:, -1].max(), 0) + pad / width
+        if not top:
+            top = max(vspaces[0].max(), 0) + pad / height
+            if suptitle is not None:
+                text, _, _, size = suptitle[:4]
+                t = text_bitmap(text, size, dpi)
+                top += (t.ascent + t.descent + pad) / height
+        if not bottom:
+            bottom = max(vspaces[-1].max(), 0) + pad / height
+        if left + right >= 1 or bottom + top >= 1:
+            return None
+
+        params = dict(SUBPLOT_PARAMS, left=left, right=1 - right, bottom=bottom, top=1 - top)
+        if ncols > 1:
+            space = hspaces[:, 1:-1].max() + pad / width
+            axes_width = (1 - right - left - space * (ncols - 1)) / ncols
+            if axes_width < 0:
+                return None
+            params["wspace"] = space / axes_width
+        if nrows > 1:
+            space = vspaces[1:-1].max() + pad / height
+            axes_height = (1 - top - bottom - space * (nrows - 1)) / nrows
+            if axes_height < 0:
+                return None
+            params["hspace"] = space / axes_height
+        return params
+
+    params = adjust(None)
+    if rect is not None and params is not None:
+        # The rect bounds the panels with their labels, so its margins come on top of the computed ones
+        params = adjust((rect[0] + params["left"], rect[1] + params["bottom"],
+                         rect[2] - (1 - params["right"]), rect[3] - (1 - params["top"])))
+    return params or SUBPLOT_PARAMS
+
+
+def draw_panel(canvas, layout, panel, curve_settings):
+    x0, y0, x1, y1 = layout["rect"]
+    color = to_rgb(panel["color"])
+    edge = to_rgb(panel["edgecolor"])
+    edge_px = canvas.points(EDGE_WIDTH)
+    for a, b, c, d in zip(*(snap(v, edge_px) for v in layout["bars"])):
+        canvas.fill_rect(a, b, c, d, color, panel["alpha"])
+        canvas.stroke_rect(a, b, c, d, edge_px, edge, panel["alpha"])
+
+    if layout["curve"] is not None:
+        canvas.polyline(*layout["curve"], canvas.points(curve_settings["linewidth"]), to_rgb(curve_settings["color"]),
+                        clip=(x0, y0, x1, y1))
+
+    # Spines and ticks
+    spine = canvas.points(SPINE_WIDTH)
+    canvas.stroke_rect(snap(x0, spine), snap(y0, spine), snap(x1, spine), snap(y1, spine), spine, (0, 0, 0))
+    tick = canvas.points(TICK_WIDTH)
+    tick_len = canvas.points(TICK_LENGTH)
+    for tx in layout["xticks"]:
+        canvas.vline(tx, y1, y1 + tick_len, tick, (0, 0, 0))
+    for ty in layout["yticks"]:
+        canvas.hline(x0 - tick_len, x0, ty, tick, (0, 0, 0))
+    for text, x, y, size, ha, va, rotation in layout["texts"]:
+        canvas.text(text, x, y, size, ha, va, rotation)
+
+
+def figure_size(figure, dpi):
+    fig_w, fig_h = figure.get("figsize", [12, 10])
+    return int(round(fig_w * dpi)), int(round(fig_h * dpi))
+
+
+def layout_variant(spec, base, variant, dpi):
+    """Lays out every panel of a variant; returns (panel layouts, curve settings, suptitle text).
+
+    The panels are laid out twice, like a figure that is drawn after tight_layout: at
+    the default geometry and TIGHT_LAYOUT_DPI to find the tight subplot parameters,
+    then in those at dpi, where the tick locator sees the final axes lengths.
+    """
+    figure = spec["figure"]
+    nrows, ncols = figure.get("nrows", 2), figure.get("ncols", 2)
+    overlay = variant.get("overlay")
+    curves = evaluate_overlay(overlay, spec, base) if overlay else [None] * len(base[0])
+
+    def place(params, dpi):
+        width, height = figure_size(figure, dpi)
+        rects = axes_rects(nrows, ncols, width, height, params)
+        layouts = [layout_panel(rect, panel_settings(spec, i), base[1][i], base[2][i], curves[i], dpi)
+                   for i, rect in enumerate(rects)]
+        suptitle = (variant.get("suptitle", figure["suptitle"]), width / 2, (1 - SUPTITLE_Y) * height,
+                    figure.get("suptitle_fontsize", 16), "center", "top", 0)
+        return layouts, suptitle, width, height
+
+    layouts, suptitle, width, height = place(SUBPLOT_PARAMS, TIGHT_LAYOUT_DPI)
+    params = tight_params(layouts, nrows, ncols, width, height, TIGHT_LAYOUT_DPI, suptitle,
+                          figure.get("tight_layout_rect"))
+    layouts, suptitle, _, _ = place(params, dpi)
+    settings = [overlay_settings(overlay, i) if overlay else None for i in range(len(layouts))]
+    return layouts, settings, suptitle
+
+
+def render_variant(spec, base, variant, dpi=None):
+    """Rasterizes one variant of a spec over sampled base data; returns an RGB uint8 array."""
+    dpi = dpi or spec["figure"].get("dpi", 300)
+    canvas = Canvas(*figure_size(spec["figure"], dpi), dpi)
+    layouts, settings, suptitle = layout_variant(spec, base, variant, dpi)
+    with profiling.stage("draw"):
+        for i, layout in enumerate(layouts):
+            draw_panel(canvas, layout, panel_settings(spec, i), settings[i])
+        canvas.text(*suptitle)
+    return canvas.pixels
+
+
+def render(spec, out_dir=".", student=None, dpi=None):
+    """Renders every variant of a parsed spec as PNG files; returns the paths written."""
+    written = []
+    with profiling.context(pt=spec["id"]):
+        base = sample_panels(spec, student)
+        for variant in spec["variants"]:
+            path = os.path.join(out_dir, output_name(os.path.splitext(variant["output"])[0] + ".png", student))
+            variant_dpi = dpi or spec["figure"].get("dpi", 300)
+            rgb = render_variant(spec, base, variant, variant_dpi)
+            with profiling.stage("encode"):
+                png = encode_png(trim(rgb, int(round(TIGHT_PAD * variant_dpi))), variant_dpi)
+            with open(path, "wb") as f:
+                f.write(png)
+            written.append(path)
+    return written
+
+
+# --- Comparison with matplotlib ---
+def render_matplotlib(spec, base, variant, dpi=None):
+    """The same variant drawn by matplotlib as production draws it (tight_layout with the
+    spec's rect, then the dpi), untrimmed, as an RGB uint8 array."""
+    import matplotlib.pyplot as plt
+    from pt_spec import variant_drawer
+
+    figure = spec["figure"]
+    fig, axes = plt.subplots(figure.get("nrows", 2), figure.get("ncols", 2), figsize=figure.get("figsize", [12, 10]))
+    for i, ax in enumerate(axes.flat):
+        panel = panel_settings(spec, i)
+        ax.hist(base[2][i][:-1], bins=base[2][i], weights=base[1][i], alpha=panel["alpha"], color=panel["color"],
+                edgecolor=panel["edgecolor"], rwidth=panel.get("rwidth"))
+        ax.set_title(panel["title"])
+        ax.set_xlabel(panel["xlabel"])
+        ax.set_ylabel(panel["ylabel"])
+        if "xlim" in panel:
+            ax.set_xlim(panel["xlim"])
+        if "xticks" in panel:
+            ax.set_xticks(panel["xticks"])
+    variant_drawer(variant, spec)(axes, base)
+    fig.tight_layout(rect=figure.get("tight_layout_rect"))
+    fig.set_dpi(dpi or figure.get("dpi", 300))
+    fig.canvas.draw()
+    rgb = np.asarray(fig.canvas.buffer_rgba())[..., :3].copy()
+    plt.close(fig)
+    return rgb
+
+
+def plot_mask(layouts, shape):
+    """Boolean (h, w) mask of the axes insides, AXES_INSET pixels clear of the spines."""
+    mask = np.zeros(shape[:2], dtype=bool)
+    for layout in layouts:
+        x0, y0, x1, y1 = (int(round(v)) for v in layout["rect"])
+        mask[y0 + AXES_INSET:y1 - AXES_INSET, x0 + AXES_INSET:x1 - AXES_INSET] = True
+    return mask
+
+
+def pixel_diff(a, b, mask=None):
+    """Returns (mean absolute difference, fraction of mismatched pixels) on a 0-1 scale,
+    over the pixels in mask (default: all)."""
+    if a.shape != b.shape:
+        return 1.0, 1.0
+    diff = np.abs(a.astype(np.float32) - b.astype(np.float32)) / 255
+    if mask is not None:
+        diff = diff[mask]
+    return float(diff.mean()), float(np.mean(diff.max(axis=-1) > MISMATCH_LEVEL))
+
+
+def check_against_matplotlib(spec_paths, dpi=100):
+    ok = True
+    for path in spec_paths:
+        with open(path) as f:
+            spec = json.load(f)
+        base = sample_panels(spec)
+        for variant in spec["variants"]:
+            rgb = render_variant(spec, base, variant, dpi)
+            reference = render_matplotlib(spec, base, variant, dpi)
+            mean, mismatch = pixel_diff(rgb, reference)
+            plot_mean, plot_mismatch = pixel_diff(rgb, reference, plot_mask(layout_variant(spec, base, variant, dpi)[0],
+                                                                            rgb.shape))
+            passed = (mean <= MAX_MEAN_DIFF and mismatch <= MAX_MISMATCH
+                      and plot_mean <= MAX_PLOT_MEAN_DIFF and plot_mismatch <= MAX_PLOT_MISMATCH)
+            ok &= passed
+            print(f"{spec['id']:<8}{variant['name']:<24}mean diff {mean:.4f}  mismatched {mismatch:.2%}  "
+                  f"plot areas {plot_mean:.4f} / {plot_mismatch:.2%}  {'ok' if passed else 'FAIL'}")
+    return ok
+
+
+def benchmark(spec_path, students=20, dpi=300):
+    import matplotlib.pyplot as plt
+    from pt_spec import render as render_matplotlib_files
+
+    with open(spec_path) as f:
+        spec = json.load(f)
+    out_dir = os.path.join("build", "raster_benchmark")
+    os.makedirs(out_dir, exist_ok=True)
+    # Personalized copies need per-student streams
+    spec = {**spec, "seed_mode": "streams", "figure": {**spec["figure"], "dpi": dpi}}
+
+    start = time.perf_counter()
+    for student in range(students):
+        render_matplotlib_files(spec, out_dir, student, cache_dir=None)
+    mpl_seconds = time.perf_counter() - start
+    plt.close("all")
+
+    start = time.perf_counter()
+    for student in range(students):
+        render(spec, out_dir, student)
+    raster_seconds = time.perf_counter() - start
+    n = students * len(spec["variants"])
+    print(f"{n} images at {dpi} dpi: matplotlib {mpl_seconds / n * 1e3:.0f}ms/image, "
+          f"raster {raster_seconds / n * 1e3:.0f}ms/image ({mpl_seconds / raster_seconds:.1f}x)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render PT spec variants with the NumPy rasterizer.")
+    parser.add_argument("specs", nargs="+", help="PT spec JSON files")
+    parser.add_argument("--out-dir", default=".", help="Directory for the rendered images")
+    parser.add_argument("--students", type=int, default=0,
+                        help="Render this many personalized copies, each from its own random streams")
+    parser.add_argument("--dpi", type=int, help="Override the spec's dpi")
+    parser.add_argument("--check", action="store_true",
+                        help="Compare against matplotlib instead of rendering, and exit 1 beyond tolerance")
+    parser.add_argument("--benchmark", action="store_true", help="Time raster against matplotlib for the first spec")
+    args = parser.parse_args(argv)
+
+    matplotlib.use("Agg")
+    if args.check:
+        return 0 if check_against_matplotlib(args.specs, args.dpi or 100) else 1
+    if args.benchmark:
+        benchmark(args.specs[0], args.students or 20, args.dpi or 300)
+        return 0
+    os.makedirs(args.out_dir, exist_ok=True)
+    students = range(args.students) if args.students else [None]
+    for path in args.specs:
+        with open(path) as f:
+            spec = json.load(f)
+        for student in students:
+            for written in render(spec, args.out_dir, student, args.dpi):
+                print(written)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+import argparse
+import ast
+import fcntl
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+import matplotlib
+import numpy as np
+import scipy
+
+# Content-addressed cache for rendered PT images.
+#
+# A render is identified by a hash of the script (or panel spec) source, the source
+# of every repo-local module it imports (directly or through other local modules),
+# its random seed and the numpy/scipy/matplotlib versions. On a hit the stored image
+# bytes are returned and nothing is drawn or encoded. The cache is capped in size
+# and evicts the least recently used entries first; the cap is kept in the index so
+# that later commands (stats, other runs) see the one it was last given.
+#
+# Several processes may use one cache at once (batch workers, the base layers that
+# scripts load). Each keeps the entries it added, used or evicted, and save() merges
+# them into the index on disk under a file lock, so no writer drops another's work.
+
+DEFAULT_CACHE_DIR = ".render_cache"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+INDEX_FILE = "index.json"
+LOCK_FILE = "index.lock"
+CACHE_DIR_ENV = "PT_RENDER_CACHE_DIR"  # Set by batch_render so scripts cache in its --cache-dir
+
+SEED_PATTERN = re.compile(r"np\.random\.seed\((\d+)\)")
+
+
+def library_versions():
+    return {
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+        "matplotlib": matplotlib.__version__,
+    }
+
+
+def find_seed(source):
+    """Returns the seed passed to np.random.seed in a script, or None."""
+    match = SEED_PATTERN.search(source)
+    return int(match.group(1)) if match else None
+
+
+def render_key(source, seed=None, extra=None):
+    """Hashes everything that determines the rendered bytes of a script or spec."""
+    if isinstance(source, str):
+        source = source.encode("utf-8")
+    header = json.dumps({"seed": seed, "versions": library_versions(), "extra": extra}, sort_keys=True)
+    digest = hashlib.sha256()
+    digest.update(header.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(source)
+    return digest.hexdigest()
+
+
+def imported_names(source):
+    """Top-level module names imported by Python source."""
+    names = set()
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split(".")[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module.split(".")[0])
+    return names
+
+
+def local_modules(source, directory):
+    """{name: source bytes} of the modules in directory that source imports, transitively."""
+    found = {}
+    pending = [source]
+    while pending:
+        try:
+            names = imported_names(pending.pop())
+        except SyntaxError:
+            continue
+        for name in sorted(names - found.keys()):
+            path = os.path.join(directory, name + ".py")
+            if os.path.isfile(path):
+                with open(path, "rb") as f:
+                    found[name] = f.read()
+                pending.append(found[name])
+    return found
+
+
+def script_key(path, extra=None):
+    with open(path, "rb") as f:
+        source = f.read()
+    seed = find_seed(source.decode("utf-8", "replace"))
+    modules = local_modules(source, os.path.dirname(os.path.abspath(path)))
+    for name in sorted(modules):
+        source += b"\0" + name.encode("utf-8") + b"\0" + modules[name]
+    return render_key(source, seed, extra)
+
+
+def shared_cache_dir(cache_dir):
+    """Returns the cache directory a script should use for cache_dir.
+
+    Under batch_render the default directory is replaced by the batch's own cache (or
+    None with --no-cache), so base layers land in the index the batch keeps and caps.
+    """
+    if cache_dir == DEFAULT_CACHE_DIR and CACHE_DIR_ENV in os.environ:
+        return os.environ[CACHE_DIR_ENV] or None
+    return cache_dir
+
+
+class RenderCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=None):
+        """max_bytes=None keeps the cap stored in the index (DEFAULT_MAX_BYTES for a new cache)."""
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, INDEX_FILE)
+        self.index = self._read_index()
+        self.max_bytes = max_bytes if max_bytes is not None else self.index.get("max_bytes", DEFAULT_MAX_BYTES)
+        self._forget_changes()
+
+    def _read_index(self):
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                return json.load(f)
+        return {"entries": {}, "hits": 0, "misses": 0}
+
+    def _forget_changes(self):
+        # What this process did since the index was read, for save() to merge
+        self._touched = set()
+        self._dropped = set()
+        self._lookups = {"hits": 0, "misses": 0}
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def get(self, key):
+        """Returns the cached [(file name, bytes), ...] for a key, or None on a miss."""
+        entry = self.index["entries"].get(key)
+        if entry is None or not os.path.isdir(self._entry_dir(key)):
+            if self.index["entries"].pop(key, None) is not None:
+                self._dropped.add(key)
+            self.index["misses"] += 1
+            self._lookups["misses"] += 1
+            return None
+        outputs = []
+        for i, name in enumerate(entry["outputs"]):
+            with open(os.path.join(self._entry_dir(key), str(i)), "rb") as f:
+                outputs.append((name, f.read()))
+        entry["last_used"] = time.time()
+        self.index["hits"] += 1
+        self._lookups["hits"] += 1
+        self._touched.add(key)
+        return outputs
+
+    def put(self, key, outputs):
+        entry_dir = self._entry_dir(key)
+        os.makedirs(entry_dir, exist_ok=True)
+        for i, (_, data) in enumerate(outputs):
+            with open(os.path.join(entry_dir, str(i)), "wb") as f:
+                f.write(data)
+        self.index["entries"][key] = {
+            "outputs": [name for name, _ in outputs],
+            "size": sum(len(data) for _, data in outputs),
+            "last_used": time.time(),
+        }
+        self._touched.add(key)
+        self._dropped.discard(key)
+        self.evict()
+
+    def total_bytes(self):
+        return sum(entry["size"] for entry in self.index["entries"].values())
+
+    def evict(self):
+        """Drops least recently used entries until the cache fits in max_bytes."""
+        entries = self.index["entries"]
+        total = self.total_bytes()
+        for key in sorted(entries, key=lambda k: entries[k]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            total -= entries.pop(key)["size"]
+            shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+            self._touched.discard(key)
+            self._dropped.add(key)
+
+    def save(self):
+        """Merges this process's changes into the index on disk and writes it back.
+
+        The index is re-read under an exclusive lock, so entries and hit counts that
+        other processes saved in the meantime are kept; the entries this one added or
+        used replace theirs unless theirs were used more recently.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(os.path.join(self.cache_dir, LOCK_FILE), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            index = self._read_index()
+            entries = index["entries"]
+            for key in self._dropped:
+                entries.pop(key, None)
+            for key in self._touched:
+                entry = self.index["entries"].get(key)
+                if entry is not None and entry["last_used"] >= entries.get(key, {}).get("last_used", 0):
+                    entries[key] = entry
+            index["hits"] += self._lookups["hits"]
+            index["misses"] += self._lookups["misses"]
+            index["max_bytes"] = self.max_bytes
+            self.index = index
+            self.evict()
+            self._forget_changes()
+
+            fd, tmp_path = tempfile.mkstemp(prefix=INDEX_FILE + ".", suffix=".tmp", dir=self.cache_dir)
+            with os.fdopen(fd, "w") as f:
+                json.dump(index, f)
+            os.replace(tmp_path, self.index_path)
+
+    def clear(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        self.index = {"entries": {}, "hits": 0, "misses": 0}
+        self._forget_changes()
+
+    def stats(self):
+        hits, misses = self.index["hits"], self.index["misses"]
+        lookups = hits + misses
+        return {
+            "entries": len(self.index["entries"]),
+            "layers": sum(entry["outputs"] == ["layer.pkl"] for entry in self.index["entries"].values()),
+            "bytes": self.total_bytes(),
+            "max_bytes": self.max_bytes,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or clear the PT render cache.")
+    parser.add_argument("command", choices=["stats", "clear"])
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--cache-max-mb", type=float,
+                        help="Size cap to report against (default: the cap the cache was last run with)")
+    args = parser.parse_args(argv)
+
+    cache = RenderCache(args.cache_dir, None if args.cache_max_mb is None else int(args.cache_max_mb * 1e6))
+    if args.command == "clear":
+        cache.clear()
+        print(f"cleared {args.cache_dir}")
+        return 0
+
+    stats = cache.stats()
+    print(f"entries:  {stats['entries']} ({stats['layers']} base layers)")
+    print(f"size:     {stats['bytes'] / 1e6:.1f} MB of {stats['max_bytes'] / 1e6:.1f} MB")
+    print(f"hits:     {stats['hits']}")
+    print(f"misses:   {stats['misses']}")
+    print(f"hit rate: {stats['hit_rate']:.1%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
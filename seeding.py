@@ -0,0 +1,76 @@
+import concurrent.futures
+import hashlib
+import sys
+import zlib
+
+import numpy as np
+
+# Random streams for PT data.
+#
+# The hand-written scripts call np.random.seed(42) and then draw every panel from the
+# one global stream, so a panel's data depends on everything drawn before it. Here
+# each (PT, student, panel) gets its own np.random.Generator whose SeedSequence is
+# addressed by spawn key rather than by draw order:
+#
+#   SeedSequence(seed, spawn_key=(pt, student)).spawn(n_panels)[panel]
+#
+# A panel therefore gets the same data whether panels are generated serially, in
+# threads or in worker processes, and adding a student or a panel never shifts the
+# data of the others.
+#
+# LEGACY mode reproduces today's images: one RandomState seeded like
+# np.random.seed(seed), shared by the panels in order.
+
+LEGACY = "legacy"
+STREAMS = "streams"
+
+
+def pt_number(pt_id):
+    """Maps a PT id such as "105608" (or any other label) to a spawn-key integer."""
+    pt_id = str(pt_id)
+    return int(pt_id) if pt_id.isdigit() else zlib.crc32(pt_id.encode("utf-8"))
+
+
+def panel_seed_sequences(seed, pt_id, n_panels, student=None):
+    key = (pt_number(pt_id),) if student is None else (pt_number(pt_id), int(student))
+    return np.random.SeedSequence(seed, spawn_key=key).spawn(n_panels)
+
+
+def panel_rngs(seed, pt_id, n_panels, student=None, mode=STREAMS):
+    """Returns one random generator per panel of a PT."""
+    if mode == LEGACY:
+        if student is not None:
+            raise ValueError("legacy seeding has a single stream per PT and cannot personalize per student")
+        rng = np.random.RandomState(seed)
+        return [rng] * n_panels
+    if mode != STREAMS:
+        raise ValueError(f"unknown seed mode {mode!r}")
+    return [np.random.Generator(np.random.PCG64(child))
+            for child in panel_seed_sequences(seed, pt_id, n_panels, student)]
+
+
+def integers(rng, low, high, size):
+    """rng.integers for a Generator, rng.randint for a legacy RandomState."""
+    if isinstance(rng, np.random.Generator):
+        return rng.integers(low, high, size)
+    return rng.randint(low, high, size)
+
+
+# --- Reproducibility check: serial vs threads vs processes ---
+def _panel_digest(args):
+    seed, pt_id, panel, student = args
+    rng = panel_rngs(seed, pt_id, panel + 1, student)[panel]
+    return hashlib.sha256(rng.normal(size=1000).tobytes()).hexdigest()
+
+
+if __name__ == "__main__":
+    tasks = [(42, "105608", panel, student) for student in range(8) for panel in range(4)]
+    serial = [_panel_digest(task) for task in tasks]
+    with concurrent.futures.ThreadPoolExecutor(4) as pool:
+        threaded = list(pool.map(_panel_digest, tasks))
+    with concurrent.futures.ProcessPoolExecutor(4) as pool:
+        processes = list(pool.map(_panel_digest, reversed(tasks)))[::-1]
+    same = serial == threaded == processes
+    print(f"{len(tasks)} panel streams identical across serial, threads and processes: {same}")
+    print(f"all streams distinct: {len(set(serial)) == len(serial)}")
+    sys.exit(0 if same else 1)
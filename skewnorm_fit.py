@@ -0,0 +1,169 @@
+import hashlib
+import sys
+import time
+from collections import OrderedDict
+
+import numpy as np
+from scipy import special, stats
+
+# Fast skew-normal maximum-likelihood fitting.
+#
+# skewnorm.fit runs SciPy's generic optimizer with numerical derivatives, which is by
+# far the slowest step of the fitted-curve scripts. Here the fit starts from the
+# method-of-moments estimate and is refined with damped Newton steps that use the
+# closed-form gradient and Hessian of the log-likelihood. Every operation is
+# vectorized over the last axis (samples) and broadcast over the leading axis, so a
+# (datasets x samples) array is fitted in one pass.
+#
+# Single-dataset fits are memoized by a hash of the data array.
+
+MAX_ITER = 50
+TOL = 1e-8
+MAX_SHAPE = 50.0  # The MLE of the shape can diverge for nearly half-normal data
+MAX_SKEW = 0.995  # Largest sample skewness a skew-normal distribution can reach
+CACHE_SIZE = 1024
+CHUNK_ROWS = 64
+
+_cache = OrderedDict()
+
+
+def method_of_moments(data):
+    """Returns (a, loc, scale) arrays matching the sample mean, std and skewness."""
+    data = np.asarray(data, dtype=float)
+    mean = data.mean(axis=-1)
+    centered = data - mean[..., None]
+    var = np.mean(centered ** 2, axis=-1)
+    skew = np.mean(centered ** 3, axis=-1) / var ** 1.5
+    skew = np.clip(skew, -MAX_SKEW, MAX_SKEW)
+
+    g = np.abs(skew) ** (2 / 3)
+    delta = np.sign(skew) * np.sqrt(np.pi / 2 * g / (g + ((4 - np.pi) / 2) ** (2 / 3)))
+    a = delta / np.sqrt(1 - delta ** 2)
+    scale = np.sqrt(var / (1 - 2 * delta ** 2 / np.pi))
+    loc = mean - scale * delta * np.sqrt(2 / np.pi)
+    return a, loc, scale
+
+
+def _derivatives(data, a, loc, log_scale):
+    """Mean log-likelihood, gradient and Hessian in (loc, log scale, a)."""
+    scale = np.exp(log_scale)
+    z = (data - loc[..., None]) / scale[..., None]
+    a_ = a[..., None]
+    u = a_ * z
+    log_cdf = special.log_ndtr(u)
+    r = np.exp(-0.5 * u * u - 0.5 * np.log(2 * np.pi) - log_cdf)  # phi(u) / Phi(u)
+    dr = -r * (u + r)
+
+    loglik = np.mean(-0.5 * z * z + log_cdf, axis=-1) - log_scale + np.log(2) - 0.5 * np.log(2 * np.pi)
+    grad = np.stack([
+        np.mean(z - a_ * r, axis=-1) / scale,
+        np.mean(z * z - a_ * z * r, axis=-1) - 1,
+        np.mean(z * r, axis=-1),
+    ], axis=-1)
+
+    h_ll = np.mean(a_ * a_ * dr - 1, axis=-1) / scale ** 2
+    h_ls = np.mean(-2 * z + a_ * dr * u + a_ * r, axis=-1) / scale
+    h_la = np.mean(-r - a_ * dr * z, axis=-1) / scale
+    h_ss = np.mean(-2 * z * z + a_ * z * r + a_ * z * u * dr, axis=-1)
+    h_sa = np.mean(-z * r - a_ * z * z * dr, axis=-1)
+    h_aa = np.mean(z * z * dr, axis=-1)
+    hess = np.stack([
+        np.stack([h_ll, h_ls, h_la], axis=-1),
+        np.stack([h_ls, h_ss, h_sa], axis=-1),
+        np.stack([h_la, h_sa, h_aa], axis=-1),
+    ], axis=-2)
+    return loglik, grad, hess
+
+
+def _loglik(data, a, loc, log_scale):
+    z = (data - loc[..., None]) / np.exp(log_scale)[..., None]
+    return (np.mean(-0.5 * z * z + special.log_ndtr(a[..., None] * z), axis=-1)
+            - log_scale + np.log(2) - 0.5 * np.log(2 * np.pi))
+
+
+def fit_many(data, chunk_rows=CHUNK_ROWS):
+    """Fits every row of a (datasets x samples) array; returns (a, loc, scale) arrays."""
+    data = np.atleast_2d(np.asarray(data, dtype=float))
+    if len(data) > chunk_rows:
+        # Chunks keep the temporaries small enough to stay in cache
+        parts = [_fit_rows(data[i:i + chunk_rows]) for i in range(0, len(data), chunk_rows)]
+        return tuple(np.concatenate(values) for values in zip(*parts))
+    return _fit_rows(data)
+
+
+def _fit_rows(data):
+    a, loc, scale = method_of_moments(data)
+    params = np.stack([loc, np.log(scale), a], axis=-1)
+    damping = np.full(len(data), 1e-3)
+    active = np.ones(len(data), dtype=bool)
+
+    for _ in range(MAX_ITER):
+        idx = np.flatnonzero(active)
+        if idx.size == 0:
+            break
+        rows, p = data[idx], params[idx]
+        loglik, grad, hess = _derivatives(rows, p[:, 2], p[:, 0], p[:, 1])
+
+        # Levenberg-Marquardt step: Newton when the Hessian behaves, gradient ascent otherwise
+        diagonal = 1 + np.abs(np.diagonal(hess, axis1=1, axis2=2))
+        system = -hess + damping[idx, None, None] * np.eye(3) * diagonal[:, None, :]
+        step = np.linalg.solve(system, grad[..., None])[..., 0]
+        candidate = p + step
+        candidate[:, 2] = np.clip(candidate[:, 2], -MAX_SHAPE, MAX_SHAPE)
+        improved = _loglik(rows, candidate[:, 2], candidate[:, 0], candidate[:, 1]) >= loglik
+
+        params[idx[improved]] = candidate[improved]
+        damping[idx] = np.where(improved, damping[idx] / 10, damping[idx] * 10)
+        converged = improved & (np.max(np.abs(step), axis=-1) < TOL * (1 + np.abs(p).max(axis=-1)))
+        stalled = damping[idx] > 1e10
+        active[idx[converged | stalled]] = False
+
+    return params[:, 2], params[:, 0], np.exp(params[:, 1])
+
+
+def _data_key(data):
+    digest = hashlib.sha1(data.tobytes())
+    digest.update(str((data.shape, data.dtype.str)).encode())
+    return digest.hexdigest()
+
+
+def fit(data):
+    """Drop-in replacement for skewnorm.fit(data): returns (a, loc, scale)."""
+    data = np.ascontiguousarray(data, dtype=float)
+    key = _data_key(data)
+    if key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+
+    a, loc, scale = fit_many(data[None, :])
+    result = (float(a[0]), float(loc[0]), float(scale[0]))
+    _cache[key] = result
+    if len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return result
+
+
+# --- Comparison with skewnorm.fit ---
+if __name__ == "__main__":
+    np.random.seed(42)
+    print(f"{'dataset':<28}{'scipy loglik':>14}{'fast loglik':>14}{'scipy':>10}{'fast':>10}")
+    for a, loc, scale in [(5, 0.2, 0.1), (5, 40, 15), (5, 50, 20), (-5, 90, 5), (2, 0, 1), (0.5, 10, 3)]:
+        data = stats.skewnorm.rvs(a, loc=loc, scale=scale, size=1000)
+        start = time.perf_counter()
+        scipy_params = stats.skewnorm.fit(data)
+        scipy_time = time.perf_counter() - start
+        start = time.perf_counter()
+        fast_params = fit(data)
+        fast_time = time.perf_counter() - start
+        scipy_ll = stats.skewnorm.logpdf(data, *scipy_params).sum()
+        fast_ll = stats.skewnorm.logpdf(data, *fast_params).sum()
+        print(f"{str((a, loc, scale)):<28}{scipy_ll:>14.4f}{fast_ll:>14.4f}"
+              f"{scipy_time * 1e3:>8.1f}ms{fast_time * 1e3:>8.1f}ms")
+
+    n_datasets = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    rng = np.random.default_rng(0)
+    shapes = rng.uniform(-6, 6, n_datasets)
+    batch = stats.skewnorm.rvs(shapes[:, None], loc=50, scale=10, size=(n_datasets, 1000), random_state=rng)
+    start = time.perf_counter()
+    fit_many(batch)
+    print(f"\nfit_many: {n_datasets} datasets x 1000 samples in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,88 @@
+import sys
+import timeit
+
+import numpy as np
+from scipy import stats
+
+# Skew-normal sampling without scipy.stats.
+#
+# skewnorm.rvs goes through the generic rv_continuous machinery (argument checks,
+# broadcasting, random_state handling) on every call, and it takes one (a, loc,
+# scale) per call, so personalized datasets cost one call each. The skew normal has
+# a direct construction: with independent standard normals Z0, Z1 and
+# delta = a / sqrt(1 + a^2),
+#
+#   X = delta * |Z0| + sqrt(1 - delta^2) * Z1
+#
+# is skew-normal with shape a. sample() evaluates exactly scipy's arrangement of
+# that formula (sign flip on Z0 < 0), with the same two normal draws from the same
+# generator, so for one parameter set it returns bit-identical values to
+# skewnorm.rvs(..., random_state=rng). Parameters broadcast, so a column of shapes
+# (k x 1) gives k datasets from one call.
+
+
+def sample(rng, n, a, loc=0, scale=1):
+    """Skew-normal draws from a np.random.Generator or RandomState.
+
+    a, loc and scale broadcast against the output: scalars give n values, columns of
+    k parameters give a (k, n) array with one dataset per row.
+    """
+    a, loc, scale = (np.asarray(p, dtype=float) for p in (a, loc, scale))
+    batch = np.broadcast_shapes(a.shape, loc.shape, scale.shape)
+    size = batch[:-1] + (n,) if batch else n
+    u0 = rng.normal(size=size)
+    x = rng.normal(size=size)
+    d = a / np.sqrt(1 + a ** 2)
+    # In place, in the same floating-point operations as scipy's
+    # where(u0 >= 0, u1, -u1) with u1 = d * u0 + v * sqrt(1 - d^2)
+    x *= np.sqrt(1 - d ** 2)
+    x += d * u0
+    np.negative(x, out=x, where=u0 < 0)
+    x *= scale
+    x += loc
+    return x
+
+
+# --- Check and benchmark against scipy.stats ---
+def check():
+    failures = 0
+    for a, loc, scale in [(5, 40, 15), (-5, 9000, 1000), (0, 0, 1), (-2.5, 60, 8)]:
+        expected = stats.skewnorm.rvs(a, loc=loc, scale=scale, size=1000, random_state=np.random.RandomState(42))
+        actual = sample(np.random.RandomState(42), 1000, a, loc, scale)
+        same = np.array_equal(actual, expected)
+        failures += not same
+        print(f"{'ok' if same else 'FAIL':<4}  a={a} loc={loc} scale={scale}: identical to skewnorm.rvs")
+
+    rng = np.random.default_rng(0)
+    shapes = np.array([[-5.0], [0.0], [5.0]])
+    draws = sample(rng, 200_000, shapes, 10, 2)
+    for row, a in zip(draws, shapes[:, 0]):
+        statistic = stats.kstest(row, stats.skewnorm(a, loc=10, scale=2).cdf).statistic
+        ok = statistic < 1.63 / np.sqrt(len(row))
+        failures += not ok
+        print(f"{'ok' if ok else 'FAIL':<4}  batched a={a}: KS {statistic:.4f}")
+    return failures
+
+
+def benchmark(datasets=1000, n=1500):
+    rng = np.random.default_rng(1)
+    scipy_time = min(timeit.repeat(lambda: stats.skewnorm.rvs(5, loc=40, scale=15, size=1000, random_state=rng),
+                                   number=100, repeat=3)) / 100
+    own_time = min(timeit.repeat(lambda: sample(rng, 1000, 5, 40, 15), number=100, repeat=3)) / 100
+    print(f"\none panel of 1000: skewnorm.rvs {scipy_time * 1e6:.0f}us, sample {own_time * 1e6:.0f}us "
+          f"({scipy_time / own_time:.1f}x)")
+    a = rng.uniform(-6, 6, (datasets, 1))
+    loc = rng.uniform(0, 100, (datasets, 1))
+    scale = rng.uniform(1, 20, (datasets, 1))
+    scipy_time = min(timeit.repeat(lambda: [stats.skewnorm.rvs(a[i, 0], loc=loc[i, 0], scale=scale[i, 0], size=n,
+                                                               random_state=rng) for i in range(datasets)],
+                                   number=1, repeat=3))
+    own_time = min(timeit.repeat(lambda: sample(rng, n, a, loc, scale), number=1, repeat=3))
+    print(f"{datasets} datasets x {n}: skewnorm.rvs loop {scipy_time * 1e3:.0f}ms, "
+          f"batched sample {own_time * 1e3:.0f}ms ({scipy_time / own_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    failed = check()
+    benchmark()
+    sys.exit(1 if failed else 0)
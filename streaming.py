@@ -0,0 +1,260 @@
+import copy
+import csv
+import itertools
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+from scipy import stats
+
+from freq_table import FrequencyTable
+from histogram import batch_histogram, histogram_edges
+
+# Out-of-core histograms.
+#
+# A panel normally holds its whole sample array until it is binned, so the sample
+# count is bounded by memory: 1e9 draws are 8 GB of float64 before np.histogram
+# even starts. StreamingHistogram takes the data in chunks instead (from a sampler,
+# a memory-mapped binary file or a CSV column) and keeps only the bin counts and the
+# running moments, so memory is one chunk plus the counters whatever the total.
+#
+# Every chunk is binned by batch_histogram against fixed edges and its central
+# moments are merged into the running ones with the pairwise update of Chan et al.
+# and Pebay, which stays accurate where the naive sum of powers would cancel. Counts
+# are exact: with the range of the whole stream the edges are the ones np.histogram
+# would use, and the counts match np.histogram(all_data, bins) bit for bit. Without
+# a known range, accumulate() reads the stream twice, once for min and max.
+#
+# The result feeds the panel pipeline as a StreamedTable, a FrequencyTable whose
+# moments are the exact running ones rather than those of the binned values.
+
+CHUNK = 1 << 20  # Values per chunk, 8 MB of float64
+
+
+def chunk_moments(x):
+    """(count, mean, M2, M3, M4) of one chunk, M_k being the sum of (x - mean)^k."""
+    n = len(x)
+    if n == 0:
+        return 0, 0.0, 0.0, 0.0, 0.0
+    mean = float(np.mean(x))
+    d = x - mean
+    # The rounding error of the mean, large for data far from 0, would bias M3 and M4
+    correction = float(np.mean(d))
+    d -= correction
+    mean += correction
+    d2 = d * d
+    return n, mean, float(d2.sum()), float(np.dot(d2, d)), float(np.dot(d2, d2))
+
+
+def merge_moments(a, b):
+    """Combines the moment tuples of two disjoint parts of a dataset."""
+    na, mean_a, m2a, m3a, m4a = a
+    nb, mean_b, m2b, m3b, m4b = b
+    if na == 0:
+        return b
+    if nb == 0:
+        return a
+    n = na + nb
+    delta = mean_b - mean_a
+    share = delta / n
+    mean = mean_a + nb * share
+    m2 = m2a + m2b + delta * share * na * nb
+    m3 = (m3a + m3b + delta * share * share * na * nb * (na - nb)
+          + 3 * share * (na * m2b - nb * m2a))
+    m4 = (m4a + m4b + delta * share ** 3 * na * nb * (na * na - na * nb + nb * nb)
+          + 6 * share * share * (na * na * m2b + nb * nb * m2a)
+          + 4 * share * (na * m3b - nb * m3a))
+    return n, mean, m2, m3, m4
+
+
+class StreamingHistogram:
+    """Bin counts and running moments of data that arrives in chunks.
+
+    bins is a bin count over range = (lo, hi), or an array of uniform edges. Values
+    outside the edges are not counted (as with np.histogram's range) but enter the
+    moments, min and max.
+    """
+
+    def __init__(self, bins, range=None):
+        if np.ndim(bins) == 0:
+            if range is None:
+                raise ValueError("a bin count needs a range; accumulate() finds one in a first pass")
+            edges = histogram_edges(np.array([range], dtype=float), int(bins))[0]
+        else:
+            edges = np.asarray(bins, dtype=float)
+        self.edges = edges
+        self.counts = np.zeros(len(edges) - 1, dtype=np.int64)
+        self.moments = (0, 0.0, 0.0, 0.0, 0.0)
+        self.min = np.inf
+        self.max = -np.inf
+
+    def add(self, chunk):
+        chunk = np.asarray(chunk, dtype=float).ravel()
+        if len(chunk) == 0:
+            return
+        self.counts += batch_histogram(chunk[None, :], len(self.counts), self.edges)[0][0]
+        self.moments = merge_moments(self.moments, chunk_moments(chunk))
+        self.min = min(self.min, float(chunk.min()))
+        self.max = max(self.max, float(chunk.max()))
+
+    @property
+    def count(self):
+        return self.moments[0]
+
+    @property
+    def mean(self):
+        return self.moments[1]
+
+    @property
+    def variance(self):
+        """Population variance, as np.var."""
+        return self.moments[2] / self.count
+
+    @property
+    def skewness(self):
+        n, _, m2, m3, _ = self.moments
+        return np.sqrt(n) * m3 / m2 ** 1.5
+
+    @property
+    def kurtosis(self):
+        """Excess kurtosis, as scipy.stats.kurtosis."""
+        n, _, m2, _, m4 = self.moments
+        return n * m4 / (m2 * m2) - 3
+
+    def table(self):
+        return StreamedTable(self)
+
+
+class StreamedTable(FrequencyTable):
+    """A panel dataset built by a StreamingHistogram: its counts, with exact moments."""
+
+    def __init__(self, histogram):
+        edges = histogram.edges
+        super().__init__((edges[:-1] + edges[1:]) / 2, histogram.counts)
+        self.edges = edges
+        self.histogram = histogram
+
+    def mean_std(self):
+        return self.histogram.mean, np.sqrt(self.histogram.variance)
+
+    def min(self):
+        return self.histogram.min
+
+    def max(self):
+        return self.histogram.max
+
+
+# --- Chunk sources ---
+def sampler_chunks(draw, n, chunk=CHUNK):
+    """Calls draw(size) until n values have been produced."""
+    for start in range(0, n, chunk):
+        yield draw(min(chunk, n - start))
+
+
+def memmap_chunks(path, dtype="float64", chunk=CHUNK):
+    """Chunks of a raw binary array file, read through a memory map."""
+    values = np.memmap(path, dtype=dtype, mode="r")
+    for start in range(0, len(values), chunk):
+        yield np.array(values[start:start + chunk], dtype=float)
+
+
+def csv_chunks(path, column=0, chunk=CHUNK):
+    """Chunks of one CSV column; a column name is looked up in the header row."""
+    with open(path, newline="") as f:
+        rows = csv.reader(f)
+        if isinstance(column, str):
+            column = next(rows).index(column)
+        while True:
+            values = np.fromiter((float(row[column]) for row in itertools.islice(rows, chunk)), dtype=float)
+            if len(values) == 0:
+                return
+            yield values
+
+
+def accumulate(source, bins, range=None):
+    """Streams the chunks of source() into a StreamingHistogram.
+
+    source is a function returning a fresh iterable of chunks. A bin count without a
+    range takes one extra pass over source() for the range, which gives the edges
+    np.histogram(data, bins) would use.
+    """
+    if np.ndim(bins) == 0 and range is None:
+        lo, hi = np.inf, -np.inf
+        for chunk in source():
+            if len(chunk):
+                lo, hi = min(lo, float(np.min(chunk))), max(hi, float(np.max(chunk)))
+        range = (lo, hi)
+    histogram = StreamingHistogram(bins, range)
+    for chunk in source():
+        histogram.add(chunk)
+    return histogram
+
+
+def replayable(rng, make_chunks):
+    """A source for accumulate() whose first call draws from a copy of rng.
+
+    With a range pass the same values are drawn twice: the copy for min and max,
+    then rng itself, which is left advanced as if the data were drawn once.
+    """
+    calls = []
+
+    def source():
+        calls.append(None)
+        return make_chunks(copy.deepcopy(rng) if len(calls) == 1 else rng)
+    return source
+
+
+# --- Check and benchmark ---
+def check(rng, path):
+    failures = 0
+    cases = [("normal", rng.normal(50, 10, 300_001)),
+             ("lomax", rng.pareto(1.5, 300_001) * 1e5),
+             ("shifted", 1e9 + rng.exponential(1.5, 300_001))]
+    for name, data in cases:
+        histogram = accumulate(lambda: (data[i:i + 65536] for i in range(0, len(data), 65536)), 15)
+        counts, edges = np.histogram(data, 15)
+        same = np.array_equal(histogram.counts, counts) and np.array_equal(histogram.edges, edges)
+        # Reference moments of the data moved near 0 (exactly), where they are accurate
+        offset = np.round(data[0])
+        centered = data - offset
+        expected = [np.mean(centered) + offset, np.var(centered), stats.skew(centered), stats.kurtosis(centered)]
+        actual = [histogram.mean, histogram.variance, histogram.skewness, histogram.kurtosis]
+        error = max(abs(a - e) / max(abs(e), 1e-12) for a, e in zip(actual, expected))
+        ok = same and error < 1e-9
+        failures += not ok
+        print(f"{'ok' if ok else 'FAIL':<4}  {name:<8} counts identical: {same}, moments relative error {error:.1e}")
+
+    data = rng.gamma(2.0, 2.5, 100_000)
+    data.tofile(path)
+    from_memmap = accumulate(lambda: memmap_chunks(path, chunk=7000), 20)
+    np.savetxt(path, np.column_stack([np.arange(len(data)), data]), delimiter=",", header="id,value", comments="")
+    from_csv = accumulate(lambda: csv_chunks(path, "value", chunk=7000), 20)
+    counts = np.histogram(data, 20)[0]
+    for name, histogram in [("memmap", from_memmap), ("csv", from_csv)]:
+        ok = np.array_equal(histogram.counts, counts)
+        failures += not ok
+        print(f"{'ok' if ok else 'FAIL':<4}  {name:<8} counts identical: {ok}")
+    return failures
+
+
+def benchmark(n=100_000_000):
+    rng = np.random.default_rng(1)
+    tracemalloc.start()
+    start = time.perf_counter()
+    histogram = accumulate(lambda: sampler_chunks(lambda size: rng.normal(0, 1, size), n), 50, (-6, 6))
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"\n{n:.0e} normal draws: {seconds:.1f}s, peak memory {peak / 2 ** 20:.0f} MB "
+          f"(the full array would be {n * 8 / 2 ** 20:.0f} MB)")
+    print(f"mean {histogram.mean:+.5f}  variance {histogram.variance:.5f}  "
+          f"skewness {histogram.skewness:+.5f}  excess kurtosis {histogram.kurtosis:+.5f}")
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        failed = check(np.random.default_rng(0), f"{directory}/values")
+    benchmark()
+    sys.exit(1 if failed else 0)
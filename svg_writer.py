@@ -0,0 +1,209 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from xml.sax.saxutils import escape
+
+import numpy as np
+import matplotlib
+
+import profiling
+from pt_spec import output_name, panel_settings, sample_panels
+from raster import (EDGE_WIDTH, SPINE_WIDTH, TICK_LENGTH, TICK_WIDTH, figure_size, layout_variant,
+                    place_text, text_bitmap)
+
+# Native SVG output for PT figures.
+#
+# matplotlib's SVG backend writes every bar as its own <path> with inline styles,
+# every glyph as a path definition, and every curve vertex with full float
+# precision, so a 500-point curve alone costs tens of kilobytes. This writer uses
+# the panel layout of raster.py (matplotlib's geometry, in points) and emits:
+#
+#   - one <path> per panel for all of its bars, with the colors in shared CSS classes
+#   - one <path> per curve, decimated to CURVE_TOLERANCE_PX at the target dpi and
+#     written with relative coordinates at fixed precision
+#   - one <path> per panel for the spines and tick marks
+#   - text as <text> elements in DejaVu Sans (the font matplotlib renders with)
+#
+# Coordinates are in points, as in matplotlib's SVG files.
+
+PRECISION = 2  # Decimals written for coordinates, in points (0.01pt is 1/24 px at 300 dpi)
+CURVE_TOLERANCE_PX = 0.25
+FONT_FAMILY = "'DejaVu Sans', 'Bitstream Vera Sans', Arial, sans-serif"
+
+
+def number(value):
+    """Formats a coordinate at PRECISION decimals without trailing zeros."""
+    text = f"{value:.{PRECISION}f}".rstrip("0").rstrip(".")
+    return "0" if text in ("", "-0") else text
+
+
+def decimate(x, y, tolerance):
+    """Ramer-Douglas-Peucker: keeps the fewest points that stay within tolerance of the polyline."""
+    n = len(x)
+    if n < 3:
+        return x, y
+    keep = np.zeros(n, dtype=bool)
+    keep[[0, -1]] = True
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        dx, dy = x[last] - x[first], y[last] - y[first]
+        px, py = x[first + 1:last] - x[first], y[first + 1:last] - y[first]
+        norm = np.hypot(dx, dy)
+        dist = np.abs(px * dy - py * dx) / norm if norm > 0 else np.hypot(px, py)
+        worst = int(np.argmax(dist))
+        if dist[worst] > tolerance:
+            split = first + 1 + worst
+            keep[split] = True
+            stack += [(first, split), (split, last)]
+    return x[keep], y[keep]
+
+
+def curve_path(x, y):
+    """An absolute move followed by relative line segments, which compress far better."""
+    points = np.round(np.column_stack([x, y]), PRECISION)
+    steps = np.diff(points, axis=0)
+    return f"M{number(points[0, 0])} {number(points[0, 1])}l" + " ".join(
+        f"{number(dx)} {number(dy)}" for dx, dy in steps)
+
+
+def bars_path(bars):
+    return "".join(f"M{number(a)} {number(d)}V{number(b)}H{number(c)}V{number(d)}z" for a, b, c, d in zip(*bars))
+
+
+def axes_path(layout):
+    x0, y0, x1, y1 = layout["rect"]
+    spine = f"M{number(x0)} {number(y0)}H{number(x1)}V{number(y1)}H{number(x0)}z"
+    xticks = "".join(f"M{number(tx)} {number(y1)}v{number(TICK_LENGTH)}" for tx in layout["xticks"])
+    yticks = "".join(f"M{number(x0)} {number(ty)}h{number(-TICK_LENGTH)}" for ty in layout["yticks"])
+    return spine, xticks + yticks
+
+
+def text_element(text, x, y, size, ha, va, rotation):
+    anchor = {"left": "start", "center": "middle", "right": "end"}[ha]
+    size_class = f"f{number(size).replace('.', '_')}"
+    if rotation == 90:
+        # y labels: the text's bottom side is at x (its baseline one descent further in), centered on y
+        baseline = x - text_bitmap(text, size, 72).descent
+        return (f'<text class="{size_class}" text-anchor="middle" transform="translate({number(baseline)} '
+                f'{number(y)}) rotate(-90)">{escape(text)}</text>')
+    _, baseline, _ = place_text(text, x, y, size, 72, ha, va)
+    return f'<text class="{size_class}" x="{number(x)}" y="{number(baseline)}" text-anchor="{anchor}">{escape(text)}</text>'
+
+
+def render_variant(spec, base, variant, dpi=None):
+    """Returns the SVG document of one variant as a string."""
+    dpi = dpi or spec["figure"].get("dpi", 300)
+    width, height = figure_size(spec["figure"], 72)
+    layouts, settings, suptitle = layout_variant(spec, base, variant, 72)
+    tolerance = CURVE_TOLERANCE_PX * 72 / dpi
+
+    styles = [
+        f"text{{font-family:{FONT_FAMILY};fill:#000}}",
+        f".a{{fill:none;stroke:#000;stroke-width:{number(SPINE_WIDTH)};stroke-linejoin:miter}}",
+        f".k{{fill:none;stroke:#000;stroke-width:{number(TICK_WIDTH)}}}",
+    ]
+    sizes = sorted({text[3] for layout in layouts for text in layout["texts"]} | {suptitle[3]})
+    styles += [f".f{number(size).replace('.', '_')}{{font-size:{number(size)}px}}" for size in sizes]
+    body = []
+    curve_classes = {}
+    for i, layout in enumerate(layouts):
+        panel = panel_settings(spec, i)
+        styles.append(f".b{i}{{fill:{panel['color']};fill-opacity:{panel['alpha']};stroke:{panel['edgecolor']};"
+                      f"stroke-opacity:{panel['alpha']};stroke-width:{number(EDGE_WIDTH)}}}")
+        body.append(f'<path class="b{i}" d="{bars_path(layout["bars"])}"/>')
+        if layout["curve"] is not None:
+            x0, y0, x1, y1 = layout["rect"]
+            body.append(f'<clipPath id="p{i}"><rect x="{number(x0)}" y="{number(y0)}" width="{number(x1 - x0)}" '
+                        f'height="{number(y1 - y0)}"/></clipPath>')
+            style = (settings[i]["color"], settings[i]["linewidth"])
+            if style not in curve_classes:
+                curve_classes[style] = f"c{len(curve_classes)}"
+                styles.append(f".{curve_classes[style]}{{fill:none;stroke:{style[0]};stroke-width:{number(style[1])};"
+                              f"stroke-linejoin:round;stroke-linecap:square}}")
+            x, y = decimate(*layout["curve"], tolerance)
+            body.append(f'<path class="{curve_classes[style]}" clip-path="url(#p{i})" d="{curve_path(x, y)}"/>')
+        spine, ticks = axes_path(layout)
+        body.append(f'<path class="a" d="{spine}"/><path class="k" d="{ticks}"/>')
+        body += [text_element(*text) for text in layout["texts"]]
+    body.append(text_element(*suptitle))
+
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{number(width)}pt" height="{number(height)}pt" '
+            f'viewBox="0 0 {number(width)} {number(height)}">\n'
+            f'<style>{"".join(styles)}</style>\n'
+            f'<rect width="100%" height="100%" fill="#fff"/>\n' + "\n".join(body) + "\n</svg>\n")
+
+
+def render(spec, out_dir=".", student=None, dpi=None):
+    """Writes every variant of a parsed spec as an SVG file; returns the paths written."""
+    written = []
+    with profiling.context(pt=spec["id"]):
+        base = sample_panels(spec, student)
+        for variant in spec["variants"]:
+            path = os.path.join(out_dir, output_name(os.path.splitext(variant["output"])[0] + ".svg", student))
+            with profiling.stage("encode"):
+                svg = render_variant(spec, base, variant, dpi)
+            with open(path, "w") as f:
+                f.write(svg)
+            written.append(path)
+    return written
+
+
+def compare_with_matplotlib(spec_paths):
+    """Times this writer against matplotlib's SVG backend and compares file sizes."""
+    import matplotlib.pyplot as plt
+    from pt_spec import render as render_matplotlib
+
+    for path in spec_paths:
+        with open(path) as f:
+            spec = json.load(f)
+        svg_spec = {**spec, "variants": [{**v, "output": os.path.splitext(v["output"])[0] + ".svg"}
+                                         for v in spec["variants"]]}
+        with tempfile.TemporaryDirectory() as mpl_dir, tempfile.TemporaryDirectory() as own_dir:
+            start = time.perf_counter()
+            mpl_files = render_matplotlib(svg_spec, mpl_dir, cache_dir=None)
+            mpl_seconds = time.perf_counter() - start
+            plt.close("all")
+            start = time.perf_counter()
+            own_files = render(spec, own_dir)
+            own_seconds = time.perf_counter() - start
+            mpl_bytes = sum(os.path.getsize(p) for p in mpl_files)
+            own_bytes = sum(os.path.getsize(p) for p in own_files)
+        print(f"{spec['id']}: matplotlib {mpl_seconds:.2f}s {mpl_bytes / 1024:.0f}KB, "
+              f"svg_writer {own_seconds:.2f}s {own_bytes / 1024:.0f}KB "
+              f"({mpl_seconds / own_seconds:.1f}x faster, {mpl_bytes / own_bytes:.1f}x smaller)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write PT spec variants as compact SVG files.")
+    parser.add_argument("specs", nargs="+", help="PT spec JSON files")
+    parser.add_argument("--out-dir", default=".", help="Directory for the SVG files")
+    parser.add_argument("--students", type=int, default=0,
+                        help="Render this many personalized copies, each from its own random streams")
+    parser.add_argument("--dpi", type=int, help="Display resolution the curve decimation is tuned for")
+    parser.add_argument("--compare", action="store_true",
+                        help="Time against matplotlib's SVG backend instead of writing files")
+    args = parser.parse_args(argv)
+
+    matplotlib.use("Agg")
+    if args.compare:
+        compare_with_matplotlib(args.specs)
+        return 0
+    os.makedirs(args.out_dir, exist_ok=True)
+    students = range(args.students) if args.students else [None]
+    for path in args.specs:
+        with open(path) as f:
+            spec = json.load(f)
+        for student in students:
+            for written in render(spec, args.out_dir, student, args.dpi):
+                print(written)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+import sys
+import timeit
+
+import numpy as np
+from scipy import special, stats
+
+from pdf_kernels import cdf, pdf
+
+# Truncated samplers.
+#
+# Templates used to draw from a distribution and then np.clip the result into the
+# plotted range (test scores in [60, 100], wealth below 2e6). Clipping moves every
+# out-of-range draw onto the boundary, which shows up as a spike in the edge bins.
+# Here values are drawn from the distribution conditioned on [low, high] instead, by
+# inverse transform: u is uniform on [F(low), F(high)] and x = F^-1(u). That is one
+# vectorized pass with exactly n draws and no rejection loop.
+#
+# The quantile functions are closed form except for the skew normal, whose CDF is
+# inverted by interpolating a tabulated CDF and polishing with Newton steps.
+
+SKEWNORM_TABLE = 2049
+NEWTON_STEPS = 1
+
+
+def _standardize(low, high, loc, scale):
+    return (low - loc) / scale, (high - loc) / scale
+
+
+def norm_ppf(u):
+    return special.ndtri(u)
+
+
+def expon_ppf(u):
+    return -np.log1p(-u)
+
+
+def lomax_ppf(u, c):
+    return np.expm1(-np.log1p(-u) / c)
+
+
+def gamma_ppf(u, a):
+    return special.gammaincinv(a, u)
+
+
+def laplace_ppf(u):
+    return np.where(u < 0.5, np.log(2 * np.minimum(u, 0.5)), -np.log(2 * (1 - np.maximum(u, 0.5))))
+
+
+def skewnorm_ppf(u, a, lo=-10.0, hi=10.0):
+    """Inverts the standard skew-normal CDF on [lo, hi] by table lookup and Newton steps."""
+    lo, hi = max(lo, -10.0), min(hi, 10.0)  # The standard skew normal has no mass to speak of beyond 10
+    grid = np.linspace(lo, hi, SKEWNORM_TABLE)
+    table = cdf("skewnorm", grid, a=a)
+    z = np.interp(u, table, grid)
+    for _ in range(NEWTON_STEPS):
+        density = pdf("skewnorm", z, a=a)
+        step = np.where(density > 1e-300, (cdf("skewnorm", z, a=a) - u) / np.maximum(density, 1e-300), 0.0)
+        z = np.clip(z - step, lo, hi)
+    return z
+
+
+def _standard(dist, params):
+    """Standard CDF and quantile function of dist, with the shape parameters bound."""
+    if dist == "skewnorm":
+        a = params["a"]
+        return (lambda z: cdf("skewnorm", z, a=a)), (lambda u, lo, hi: skewnorm_ppf(u, a, lo, hi))
+    shapes = {"lomax": "c", "gamma": "a"}
+    shape = {shapes[dist]: params[shapes[dist]]} if dist in shapes else {}
+    quantile = QUANTILES[dist]
+    return (lambda z: cdf(dist, z, **shape)), (lambda u, lo, hi: quantile(u, **shape))
+
+
+QUANTILES = {
+    "norm": norm_ppf,
+    "expon": expon_ppf,
+    "lomax": lomax_ppf,
+    "gamma": gamma_ppf,
+    "laplace": laplace_ppf,
+}
+
+
+def sample(dist, rng, n, low, high, loc=0, scale=1, **shape):
+    """Draws n values of dist(loc, scale, *shape) conditioned on low <= x <= high.
+
+    rng is a np.random.Generator or a legacy RandomState; low/high may be None for an
+    open side.
+    """
+    if dist not in QUANTILES and dist != "skewnorm":
+        raise ValueError(f"no truncated sampler for {dist!r}")
+    z_low, z_high = _standardize(-np.inf if low is None else low, np.inf if high is None else high, loc, scale)
+    standard_cdf, quantile = _standard(dist, shape)
+    u_low, u_high = standard_cdf(np.array([z_low, z_high]))
+    if not u_high > u_low:
+        raise ValueError(f"[{low}, {high}] has no probability under {dist}")
+    u = u_low + (u_high - u_low) * rng.random(n)
+    z = np.clip(quantile(u, z_low, z_high), z_low, z_high)
+    return loc + scale * z
+
+
+# --- Check and benchmark ---
+CHECK_CASES = [
+    ("norm", {"loc": 75, "scale": 12}, 60, 100),
+    ("skewnorm", {"a": -5, "loc": 95, "scale": 12}, 60, 100),
+    ("expon", {"loc": 0, "scale": 1.5}, 0.5, 6),
+    ("lomax", {"c": 1.5, "loc": 0, "scale": 1e5}, None, 2e6),
+    ("gamma", {"a": 2.0, "loc": 0, "scale": 2.5}, 1, 15),
+    ("laplace", {"loc": 25, "scale": 2}, 20, 27),
+]
+
+
+def check(n=200_000, seed=0):
+    """Kolmogorov-Smirnov test of every case against scipy's conditional CDF."""
+    rng = np.random.default_rng(seed)
+    failures = 0
+    for dist, params, low, high in CHECK_CASES:
+        x = sample(dist, rng, n, low, high, **params)
+        frozen = getattr(stats, dist)(**params)
+        lo_cdf = frozen.cdf(low) if low is not None else 0.0
+        hi_cdf = frozen.cdf(high) if high is not None else 1.0
+        statistic = stats.kstest(x, lambda v: (frozen.cdf(v) - lo_cdf) / (hi_cdf - lo_cdf)).statistic
+        inside = (low is None or x.min() >= low) and (high is None or x.max() <= high)
+        ok = inside and statistic < 1.63 / np.sqrt(n)  # 1% critical value
+        failures += not ok
+        print(f"{'ok' if ok else 'FAIL':<4}  {dist:<9} [{low}, {high}]  KS {statistic:.4f}  in range: {inside}")
+    return failures
+
+
+def benchmark(n=1_000_000):
+    rng = np.random.default_rng(1)
+    print(f"\n{'case':<30}{'scipy truncnorm':>16}{'sample':>10}")
+    scipy_time = min(timeit.repeat(lambda: stats.truncnorm.rvs(-15 / 12, 25 / 12, loc=75, scale=12, size=n,
+                                                               random_state=rng), number=1, repeat=3))
+    own_time = min(timeit.repeat(lambda: sample("norm", rng, n, 60, 100, loc=75, scale=12), number=1, repeat=3))
+    print(f"{'norm, 1e6 draws':<30}{scipy_time * 1e3:>14.1f}ms{own_time * 1e3:>8.1f}ms")
+    own_time = min(timeit.repeat(lambda: sample("skewnorm", rng, n, 60, 100, a=-5, loc=95, scale=12),
+                                 number=1, repeat=3))
+    print(f"{'skewnorm, 1e6 draws':<30}{'-':>16}{own_time * 1e3:>8.1f}ms")
+
+
+if __name__ == "__main__":
+    failed = check()
+    benchmark()
+    sys.exit(1 if failed else 0)